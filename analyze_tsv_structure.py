@@ -5,17 +5,31 @@
 Analyze the structure of Tesseract TSV output to understand the layout better.
 """
 
+import os
 import subprocess
 import re
+import sys
 from collections import defaultdict
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from cache import ResultCache, file_sha256, make_key
+
+# Raw TSV is cached per image and PSM, so re-running after tweaking the
+# layout code doesn't re-run Tesseract. Delete .ocr_cache/ to start fresh.
+TSV_CACHE = ResultCache(os.path.join('.ocr_cache', 'tsv'), suffix='.tsv')
+
 def run_tesseract_tsv(image_path):
     """Run Tesseract on an image and return TSV output."""
+    cache_key = make_key(file_sha256(image_path), {'psm': 1, 'lang': 'nld'})
+    cached = TSV_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
     try:
         result = subprocess.run([
             'tesseract', image_path, 'stdout', '-l', 'nld', '--psm', '1', 'tsv'
         ], capture_output=True, text=True, check=True)
 
+        TSV_CACHE.put(cache_key, result.stdout)
         return result.stdout
     except subprocess.CalledProcessError as e:
         print(f"Error running Tesseract: {e}")
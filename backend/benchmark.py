@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the PDF processing pipeline.
+
+Usage:
+    python benchmark.py engines [images...]   # tesseract CLI vs. tesserocr
+    python benchmark.py rasterizers [pdf]     # pdftoppm PNG files vs. PyMuPDF pixmaps
+    python benchmark.py adaptive              # fixed vs. adaptive render scale, time and accuracy
+    python benchmark.py suite [-o out.json]   # every stage: wall, CPU, peak RSS, throughput
+    python benchmark.py compare base.json new.json
+"""
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import tesseract_api
+import pdf_processor
+from pdf_processor import (OcrOptions, detect_columns, format_markdown, iter_pdf_pages,
+                           process_pdf_to_markdown, run_tesseract_tsv)
+from words import parse_tsv
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DOCS_DIR = os.path.join(REPO_DIR, "docs")
+SAMPLE_PDF = os.path.join(DOCS_DIR, "2023-10 kwartel, kabeljauw, kalf, bananenrol.pdf")
+
+def sample_pages() -> List[str]:
+    """The sample menu pages shipped in docs/."""
+    return sorted(glob.glob(os.path.join(DOCS_DIR, "page-*.png")))
+
+def time_calls(func: Callable[[], object], repeat: int) -> List[float]:
+    """Return the wall time in seconds of each of repeat calls to func."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def print_timings(label: str, timings: Dict[str, List[float]]) -> None:
+    all_timings = [t for page_timings in timings.values() for t in page_timings]
+    print(f"{label}:")
+    for name, page_timings in timings.items():
+        print(f"  {name}: mean {statistics.mean(page_timings) * 1000:.0f} ms, "
+              f"min {min(page_timings) * 1000:.0f} ms")
+    print(f"  total mean per page: {statistics.mean(all_timings) * 1000:.0f} ms")
+
+def expected_page_words() -> Dict[str, set]:
+    """Ground-truth words per sample page (lowercased), from ground_truth.py."""
+    sys.path.insert(0, REPO_DIR)
+    from ground_truth import EXPECTED_CONTENT, expected_words
+
+    return {
+        page: expected_words(line for lines in columns.values() for line in lines)
+        for page, columns in EXPECTED_CONTENT.items()
+    }
+
+def tsv_words(tsv_data: str) -> set:
+    """Lowercased word texts from TSV output."""
+    return {text.strip().lower() for text in parse_tsv(tsv_data).text if text.strip()}
+
+def benchmark_engines(args) -> None:
+    """Compare the tesseract CLI (process per page) with pooled tesserocr handles."""
+    images = args.images or sample_pages()
+    engines = ["cli"]
+    if tesseract_api.available():
+        engines.append("tesserocr")
+    else:
+        print("tesserocr is not installed, only benchmarking the CLI engine")
+
+    for engine in engines:
+        # Warm up: the first tesserocr call loads the model into the pool
+        run_tesseract_tsv(images[0], psm=args.psm, lang=args.lang, engine=engine)
+        timings = {
+            os.path.basename(image): time_calls(
+                lambda: run_tesseract_tsv(image, psm=args.psm, lang=args.lang, engine=engine), args.repeat)
+            for image in images
+        }
+        print_timings(engine, timings)
+
+def benchmark_rasterizers(args) -> None:
+    """Compare pdftoppm PNG files with in-memory PyMuPDF pixmaps, render and OCR time per page."""
+    with tempfile.TemporaryDirectory(prefix="pdfocr-bench-") as pdf_dir:
+        pdf = args.pdf or sample_pdf(pdf_dir)
+        if pdf is None:
+            print("No sample PDF and PyMuPDF is not installed to build one, pass a PDF to render")
+            return
+        compare_rasterizers(pdf, args)
+
+def compare_rasterizers(pdf: str, args) -> None:
+    """Render and OCR every page of pdf with each rasterizer and OCR engine and print the mean times."""
+    rasterizers = ["pdftoppm"]
+    if pdf_processor.fitz is not None:
+        rasterizers.append("pymupdf")
+    else:
+        print("PyMuPDF is not installed, only benchmarking pdftoppm")
+    engines = ["cli", "tesserocr"] if tesseract_api.available() else ["cli"]
+
+    for rasterizer in rasterizers:
+        render_timings = []
+        ocr_timings: Dict[str, List[float]] = {engine: [] for engine in engines}
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory(prefix="pdfocr-bench-") as scratch_dir:
+                options = OcrOptions(scale=args.scale, rasterizer=rasterizer, text_layer=False)
+                pages = iter_pdf_pages(pdf, scratch_dir, options=options)
+                while True:
+                    start = time.perf_counter()
+                    page = next(pages, None)
+                    if page is None:
+                        break
+                    render_timings.append(time.perf_counter() - start)
+                    for engine in engines:
+                        ocr_timings[engine].extend(time_calls(
+                            lambda: run_tesseract_tsv(page[1], lang=args.lang, engine=engine), 1))
+
+        print(f"{rasterizer}:")
+        print(f"  render: mean {statistics.mean(render_timings) * 1000:.0f} ms per page")
+        for engine, timings in ocr_timings.items():
+            print(f"  ocr ({engine}): mean {statistics.mean(timings) * 1000:.0f} ms per page")
+
+def benchmark_adaptive(args) -> None:
+    """Compare fixed render scales with the adaptive scale: OCR time and expected-word hit rate per page.
+
+    The sample pages are PNGs, so every render resamples the same 1200 pixel
+    scan; with vector PDFs larger renders carry real extra detail.
+    """
+    if pdf_processor.fitz is None:
+        print("The adaptive benchmark needs PyMuPDF to render the sample pages")
+        return
+    expected = expected_page_words()
+    modes = [str(scale) for scale in args.scales] + ["adaptive"]
+
+    print(f"{'page':<8}{'mode':>10}{'scale':>7}{'time':>9}{'hits':>9}")
+    totals = {mode: [0.0, 0, 0] for mode in modes}  # seconds, hits, expected
+    for image in sample_pages():
+        name = os.path.splitext(os.path.basename(image))[0]
+        with pdf_processor.fitz.open(image) as doc:
+            page = doc[0]
+            for mode in modes:
+                start = time.perf_counter()
+                if mode == "adaptive":
+                    probe = pdf_processor.render_pixmap(page, pdf_processor.PROBE_SCALE, gray=True)
+                    x_height = pdf_processor.estimate_x_height(probe)
+                    scale = pdf_processor.adaptive_scale(x_height) if x_height else args.scales[0]
+                else:
+                    scale = int(mode)
+                raster = pdf_processor.render_pixmap(page, scale)
+                tsv_data = run_tesseract_tsv(raster, lang=args.lang, engine=args.engine) or ""
+                elapsed = time.perf_counter() - start
+
+                totals[mode][0] += elapsed
+                hit_rate = "-"
+                if name in expected:  # no ground truth for the title page
+                    hits = len(expected[name] & tsv_words(tsv_data))
+                    totals[mode][1] += hits
+                    totals[mode][2] += len(expected[name])
+                    hit_rate = f"{hits}/{len(expected[name])}"
+                print(f"{name:<8}{mode:>10}{scale:>7}{elapsed * 1000:>7.0f}ms{hit_rate:>9}")
+
+    print("total:")
+    for mode, (elapsed, hits, total) in totals.items():
+        print(f"  {mode}: {elapsed:.2f} s, {hits}/{total} expected words ({hits / max(total, 1):.0%})")
+
+def git_commit() -> str:
+    """Short hash of the checked-out commit, with "-dirty" for uncommitted changes."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_DIR,
+                                capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return commit + ("-dirty" if status.strip() else "")
+
+def tesseract_version() -> str:
+    if tesseract_api.available():
+        return tesseract_api.tesserocr.tesseract_version().splitlines()[0]
+    try:
+        result = subprocess.run(["tesseract", "--version"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return (result.stdout or result.stderr).splitlines()[0]
+
+def sample_pdf(scratch_dir: str) -> Optional[str]:
+    """The sample PDF, or one built from docs/page-*.png with PyMuPDF if it isn't checked out."""
+    if os.path.exists(SAMPLE_PDF):
+        return SAMPLE_PDF
+    fitz = pdf_processor.fitz
+    if fitz is None:
+        return None
+    path = os.path.join(scratch_dir, "sample.pdf")
+    with fitz.open() as doc:
+        for image in sample_pages():
+            with fitz.open(image) as page_image:
+                with fitz.open("pdf", page_image.convert_to_pdf()) as page_pdf:
+                    doc.insert_pdf(page_pdf)
+        doc.save(path)
+    return path
+
+# Suite stages. Each setup function receives the fixture built by
+# benchmark_suite and returns the callable that is timed; it returns the
+# number of items (pages) it processed.
+
+def setup_rasterize(fixture: Dict) -> Callable[[], int]:
+    def run() -> int:
+        with tempfile.TemporaryDirectory(prefix="pdfocr-bench-") as scratch_dir:
+            return sum(1 for _ in iter_pdf_pages(fixture["pdf"], scratch_dir, options=fixture["options"]))
+    return run
+
+def setup_ocr(fixture: Dict) -> Callable[[], int]:
+    options = fixture["options"]
+    def run() -> int:
+        for image in fixture["images"]:
+            run_tesseract_tsv(image, psm=options.psm, oem=options.oem, lang=options.lang, engine=options.engine)
+        return len(fixture["images"])
+    return run
+
+def setup_parse(fixture: Dict) -> Callable[[], int]:
+    def run() -> int:
+        for tsv_data in fixture["tsv"]:
+            parse_tsv(tsv_data)
+        return len(fixture["tsv"])
+    return run
+
+def setup_detect_columns(fixture: Dict) -> Callable[[], int]:
+    pages = [parse_tsv(tsv_data) for tsv_data in fixture["tsv"]]
+    def run() -> int:
+        for words in pages:
+            detect_columns(words, fixture["options"].num_columns)
+        return len(pages)
+    return run
+
+def setup_format_markdown(fixture: Dict) -> Callable[[], int]:
+    layouts = [detect_columns(parse_tsv(tsv_data), fixture["options"].num_columns) for tsv_data in fixture["tsv"]]
+    def run() -> int:
+        for layout in layouts:
+            format_markdown(layout)
+        return len(layouts)
+    return run
+
+def setup_end_to_end(fixture: Dict) -> Callable[[], int]:
+    def run() -> int:
+        process_pdf_to_markdown(fixture["pdf"], options=fixture["options"])
+        return fixture["pdf_pages"]
+    return run
+
+SUITE_STAGES = {
+    "rasterize": setup_rasterize,
+    "ocr": setup_ocr,
+    "parse": setup_parse,
+    "detect_columns": setup_detect_columns,
+    "format_markdown": setup_format_markdown,
+    "end_to_end": setup_end_to_end,
+}
+PDF_STAGES = {"rasterize", "end_to_end"}
+
+def cpu_seconds() -> float:
+    """User + system CPU time of this process and its finished children (tesseract runs)."""
+    usage = [resource.getrusage(who) for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)]
+    return sum(u.ru_utime + u.ru_stime for u in usage)
+
+def peak_rss_kb() -> int:
+    """High-water resident set size of this process in KiB.
+
+    VmHWM starts over at exec, so a spawned stage process doesn't report the
+    parent's peak the way ru_maxrss (kept across fork + exec) would.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def run_stage(stage: str, fixture: Dict, repeat: int) -> Dict:
+    """Time one suite stage; runs in a fresh process so peak RSS belongs to this stage alone."""
+    run = SUITE_STAGES[stage](fixture)
+    baseline_rss = peak_rss_kb()
+    wall, cpu = [], []
+    items = 0
+    for _ in range(repeat):
+        cpu_start = cpu_seconds()
+        start = time.perf_counter()
+        items = run()
+        wall.append(time.perf_counter() - start)
+        cpu.append(cpu_seconds() - cpu_start)
+    return {
+        "items": items,
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "baseline_rss_kb": baseline_rss,
+        "peak_rss_kb": peak_rss_kb(),
+        # largest finished child process, i.e. a tesseract or pdftoppm run
+        "child_peak_rss_kb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+        "throughput_per_s": items / min(wall) if min(wall) > 0 else None,
+    }
+
+def benchmark_suite(args) -> None:
+    """Run every pipeline stage over the sample pages and PDF and write the results as JSON."""
+    options = OcrOptions(lang=args.lang, engine=args.engine, text_layer=False)
+    stages = args.stages or list(SUITE_STAGES)
+    with tempfile.TemporaryDirectory(prefix="pdfocr-bench-") as scratch_dir:
+        images = sample_pages()
+        pdf = sample_pdf(scratch_dir)
+        fixture = {
+            "images": images,
+            # OCR output for the parse and layout stages is computed once, untimed
+            "tsv": [run_tesseract_tsv(image, psm=options.psm, oem=options.oem, lang=options.lang,
+                                      engine=options.engine) or "" for image in images],
+            "pdf": pdf,
+            "pdf_pages": pdf_processor.pdf_page_count(pdf) if pdf else 0,
+            "options": options,
+        }
+        if pdf is None:
+            print("No sample PDF and PyMuPDF is not installed, skipping the rasterize and end_to_end stages")
+            stages = [stage for stage in stages if stage not in PDF_STAGES]
+
+        results = {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "tesseract": tesseract_version(),
+            "options": {**pdf_processor.asdict(options), "max_workers": pdf_processor.MAX_OCR_WORKERS},
+            "inputs": {"images": [os.path.basename(image) for image in images],
+                       "pdf": os.path.basename(pdf) if pdf else None},
+            "repeat": args.repeat,
+            "stages": {},
+        }
+        print(f"{'stage':<16}{'items':>6}{'wall min':>10}{'wall mean':>11}{'cpu mean':>10}"
+              f"{'peak RSS':>10}{'items/s':>9}")
+        for stage in stages:
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                result = executor.submit(run_stage, stage, fixture, args.repeat).result()
+            results["stages"][stage] = result
+            throughput = result["throughput_per_s"]
+            print(f"{stage:<16}{result['items']:>6}{min(result['wall_s']) * 1000:>8.1f}ms"
+                  f"{statistics.mean(result['wall_s']) * 1000:>9.1f}ms{statistics.mean(result['cpu_s']) * 1000:>8.1f}ms"
+                  f"{result['peak_rss_kb'] / 1024:>8.1f}MB{throughput or 0:>9.1f}")
+
+    output = args.output or os.path.join("benchmark-results", f"{results['commit']}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+def benchmark_compare(args) -> None:
+    """Compare two suite results by best wall time per stage; exit 1 if a stage got slower than the threshold."""
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    print(f"{base['commit']} -> {new['commit']}")
+    if base.get("options") != new.get("options") or base.get("tesseract") != new.get("tesseract"):
+        print("warning: options or tesseract version differ between the runs")
+
+    regressions = []
+    print(f"{'stage':<16}{'base':>10}{'new':>10}{'change':>9}{'peak RSS':>16}")
+    for stage, new_result in new["stages"].items():
+        base_result = base["stages"].get(stage)
+        if base_result is None:
+            continue
+        base_wall, new_wall = min(base_result["wall_s"]), min(new_result["wall_s"])
+        change = new_wall / base_wall - 1 if base_wall > 0 else 0.0
+        flag = ""
+        if change > args.threshold:
+            regressions.append(stage)
+            flag = "  REGRESSION"
+        print(f"{stage:<16}{base_wall * 1000:>8.1f}ms{new_wall * 1000:>8.1f}ms{change:>+9.1%}"
+              f"{base_result['peak_rss_kb'] / 1024:>7.1f}->{new_result['peak_rss_kb'] / 1024:.1f}MB{flag}")
+    if regressions:
+        print(f"Slower than {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the PDF processing pipeline.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    engines = subparsers.add_parser("engines", help="tesseract CLI vs. in-process tesserocr")
+    engines.add_argument("images", nargs="*", help="page images (default: docs/page-*.png)")
+    engines.add_argument("--repeat", type=int, default=3)
+    engines.add_argument("--psm", type=int, default=3)
+    engines.add_argument("--lang", default="nld")
+    engines.set_defaults(func=benchmark_engines)
+
+    rasterizers = subparsers.add_parser("rasterizers", help="pdftoppm PNG files vs. PyMuPDF pixmaps")
+    rasterizers.add_argument("pdf", nargs="?", help="PDF to render (default: the sample menu, or one built "
+                                                   "from docs/page-*.png if it isn't checked out)")
+    rasterizers.add_argument("--repeat", type=int, default=1)
+    rasterizers.add_argument("--scale", type=int, default=1200)
+    rasterizers.add_argument("--lang", default="nld")
+    rasterizers.set_defaults(func=benchmark_rasterizers)
+
+    adaptive = subparsers.add_parser("adaptive", help="fixed vs. adaptive render scale on docs/page-*.png")
+    adaptive.add_argument("--scales", type=int, nargs="+", default=[800, 1200, 1600, 2400],
+                          help="fixed scales to compare against")
+    adaptive.add_argument("--engine", default=pdf_processor.OCR_ENGINE, choices=["cli", "tesserocr"])
+    adaptive.add_argument("--lang", default="nld")
+    adaptive.set_defaults(func=benchmark_adaptive)
+
+    suite = subparsers.add_parser("suite", help="all pipeline stages on docs/ with wall, CPU, RSS and throughput")
+    suite.add_argument("-o", "--output", help="results file (default: benchmark-results/<commit>.json)")
+    suite.add_argument("--stages", nargs="+", choices=list(SUITE_STAGES), help="stages to run (default: all)")
+    suite.add_argument("--repeat", type=int, default=3)
+    suite.add_argument("--engine", default=pdf_processor.OCR_ENGINE, choices=["cli", "tesserocr"])
+    suite.add_argument("--lang", default="nld")
+    suite.set_defaults(func=benchmark_suite)
+
+    compare = subparsers.add_parser("compare", help="compare two suite result files")
+    compare.add_argument("base")
+    compare.add_argument("new")
+    compare.add_argument("--threshold", type=float, default=0.10,
+                         help="relative slowdown reported as a regression (default: 0.10)")
+    compare.set_defaults(func=benchmark_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Content-addressed caches for OCR results.
+An in-memory LRU tier sits in front of an optional on-disk tier that is
+trimmed to a maximum size, evicting the least recently used entries first.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+def file_sha256(path: str) -> str:
+    """Return the hex SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def make_key(content_hash: str, params: dict) -> str:
+    """Combine a content hash with the parameters that affect the output."""
+    encoded = json.dumps(params, sort_keys=True)
+    return hashlib.sha256(f"{content_hash}:{encoded}".encode('utf-8')).hexdigest()
+
+class ResultCache:
+    """Two-tier (memory + disk) cache of text values keyed by make_key()."""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_memory_items: int = 128,
+                 max_disk_bytes: int = 512 * 1024 * 1024, suffix: str = '.md'):
+        self.cache_dir = cache_dir
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self.suffix = suffix
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        value = self._read_disk(key)
+        if value is not None:
+            self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        self._remember(key, value)
+        self._write_disk(key, value)
+
+    def _remember(self, key: str, value: str) -> None:
+        if self.max_memory_items <= 0:
+            return
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_items:
+                self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + self.suffix)
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = f.read()
+            # Bump the mtime so eviction sees this entry as recently used
+            os.utime(path)
+            return value
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, value: str) -> None:
+        if not self.cache_dir:
+            return
+        try:
+            # Write to a temp file and rename so readers never see partial entries
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(value)
+            os.replace(temp_path, self._path(key))
+        except OSError as e:
+            logger.error("Error writing cache entry: %s", e)
+            return
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(self.suffix):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        # Drop least recently used entries until we're under the size limit
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
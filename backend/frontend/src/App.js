@@ -1,4 +1,3 @@
-import React from 'react';
 import React, { useState } from 'react';
 import MarkdownEditor from './components/MarkdownEditor';
 import './App.css';
@@ -7,6 +6,7 @@ function App() {
   const [markdown, setMarkdown] = useState('');
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
+  const [progress, setProgress] = useState(null);
 
   const handleFileChange = async (e) => {
     setError('');
@@ -21,16 +21,43 @@ function App() {
       return;
     }
     setLoading(true);
+    setMarkdown('');
+    setProgress(null);
     const formData = new FormData();
     formData.append('file', file);
     try {
-      const res = await fetch('http://localhost:52560/upload', {
+      // Stream newline-delimited JSON events so pages show up as they finish
+      const res = await fetch('http://localhost:52560/upload?stream=ndjson', {
         method: 'POST',
         body: formData,
       });
       if (!res.ok) throw new Error('Failed to process PDF');
-      const data = await res.json();
-      setMarkdown(data.markdown);
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      const pages = {};
+      let buffer = '';
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        for (const line of lines) {
+          if (!line.trim()) continue;
+          const event = JSON.parse(line);
+          if (event.type === 'progress') {
+            setProgress(event);
+          } else if (event.type === 'page') {
+            pages[event.page] = event.markdown;
+            const ordered = Object.keys(pages).sort((a, b) => a - b).map((page) => pages[page]);
+            setMarkdown(ordered.join('\n---\n'));
+          } else if (event.type === 'done') {
+            setMarkdown(event.markdown);
+          } else if (event.type === 'error') {
+            throw new Error(event.detail);
+          }
+        }
+      }
     } catch (err) {
       setError(err.message);
     } finally {
@@ -42,7 +69,12 @@ function App() {
     <div className="App" style={{ maxWidth: 900, margin: '40px auto', padding: 24 }}>
       <h1>PDF Menu OCR to Markdown</h1>
       <input type="file" accept="application/pdf" onChange={handleFileChange} />
-      {loading && <p>Processing PDF, please wait...</p>}
+      {loading && (
+        <p>
+          Processing PDF, please wait...
+          {progress && progress.page_count ? ` (${progress.pages_done}/${progress.page_count} pages)` : ''}
+        </p>
+      )}
       {error && <p style={{ color: 'red' }}>{error}</p>}
       <MarkdownEditor markdown={markdown} onChange={setMarkdown} />
     </div>
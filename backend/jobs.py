@@ -0,0 +1,80 @@
+"""
+In-memory registry of asynchronous OCR jobs.
+Jobs are created by POST /jobs, run on the OCR executor and polled by id.
+"""
+
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+
+# Finished jobs are kept this long (seconds) so clients can fetch the result
+JOB_TTL = 60 * 60
+
+class Job:
+    """State of a single PDF conversion job."""
+
+    def __init__(self, filename: str):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.status = "queued"  # queued -> running -> done | failed
+        self.pages_done = 0
+        self.page_count: Optional[int] = None
+        self.markdown: Optional[str] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def update_progress(self, pages_done: int, page_count: Optional[int]) -> None:
+        """Progress callback for process_pdf_to_markdown."""
+        self.status = "running"
+        self.pages_done = pages_done
+        self.page_count = page_count
+
+    def finish(self, markdown: str) -> None:
+        self.markdown = markdown
+        self.status = "done"
+        self.finished_at = time.time()
+
+    def fail(self, error: str) -> None:
+        self.error = error
+        self.status = "failed"
+        self.finished_at = time.time()
+
+    def to_dict(self) -> Dict:
+        """Status summary returned by GET /jobs/{id}."""
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "pages_done": self.pages_done,
+            "page_count": self.page_count,
+            "error": self.error,
+        }
+
+class JobStore:
+    """Thread-safe job registry that forgets finished jobs after JOB_TTL."""
+
+    def __init__(self, ttl: float = JOB_TTL):
+        self.ttl = ttl
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def create(self, filename: str) -> Job:
+        job = Job(filename)
+        with self._lock:
+            self._expire()
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
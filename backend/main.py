@@ -8,13 +8,113 @@ FastAPI backend for PDF Menu OCR to Markdown MVP
 
 from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 import pytesseract
+import asyncio
+import json
+import logging
 import tempfile
+import threading
 import os
-from pdf_processor import process_pdf_to_markdown
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Optional
+from cache import ResultCache
+from jobs import Job, JobStore
+from metrics import render_metrics, span
+from pdf_processor import MAX_OCR_WORKERS, SCRATCH_ROOT, PageCallback, ProgressCallback, process_pdf_to_markdown
 
-app = FastAPI(title="PDF Menu OCR to Markdown API", description="MVP for PDF to Markdown conversion with OCR", version="0.1.0")
+# Log level of the pipeline; DEBUG adds per-page timings and Tesseract output
+logging.basicConfig(level=os.environ.get("PDFOCR_LOG_LEVEL", "INFO").upper(),
+                    format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger(__name__)
+
+# Upload size limit. Uploads are streamed to disk in UPLOAD_CHUNK_SIZE pieces
+# and aborted as soon as they exceed the limit.
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Allowance for multipart boundaries and part headers in the request body
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# OCR runs on a dedicated executor so the event loop stays responsive.
+# OCR_EXECUTOR_WORKERS documents are processed at once; at most
+# OCR_MAX_PENDING (running + queued) are admitted, the rest get a 503.
+# The documents split the MAX_OCR_WORKERS Tesseract runs between them, so
+# concurrent uploads don't start more Tesseract processes than there are
+# cores.
+OCR_EXECUTOR_WORKERS = int(os.environ.get("PDFOCR_EXECUTOR_WORKERS", "2"))
+OCR_MAX_PENDING = int(os.environ.get("PDFOCR_MAX_PENDING", str(OCR_EXECUTOR_WORKERS * 4)))
+DOCUMENT_OCR_WORKERS = max(1, MAX_OCR_WORKERS // OCR_EXECUTOR_WORKERS)
+
+ocr_executor = ThreadPoolExecutor(max_workers=OCR_EXECUTOR_WORKERS, thread_name_prefix="ocr")
+ocr_slots = threading.BoundedSemaphore(OCR_MAX_PENDING)
+jobs = JobStore()
+
+# Repeat uploads of the same PDF are answered from this cache, and raw
+# Tesseract TSV is cached per page image. The disk tiers are only used when
+# PDFOCR_CACHE_DIR is set.
+CACHE_DIR = os.environ.get("PDFOCR_CACHE_DIR") or None
+CACHE_DISK_BYTES = int(os.environ.get("PDFOCR_CACHE_DISK_MB", "512")) * 1024 * 1024
+result_cache = ResultCache(
+    cache_dir=CACHE_DIR,
+    max_memory_items=int(os.environ.get("PDFOCR_CACHE_MEMORY_ITEMS", "128")),
+    max_disk_bytes=CACHE_DISK_BYTES,
+    suffix='.json',
+)
+tsv_cache = ResultCache(
+    cache_dir=os.path.join(CACHE_DIR, "tsv") if CACHE_DIR else None,
+    max_memory_items=int(os.environ.get("PDFOCR_CACHE_MEMORY_ITEMS", "128")),
+    max_disk_bytes=CACHE_DISK_BYTES,
+    suffix='.tsv',
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    ocr_executor.shutdown(wait=False, cancel_futures=True)
+
+app = FastAPI(title="PDF Menu OCR to Markdown API", description="MVP for PDF to Markdown conversion with OCR", version="0.1.0", lifespan=lifespan)
+
+def upload_too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail="File too large (max 50MB).")
+
+class MaxBodySizeMiddleware:
+    """Abort request bodies larger than max_bytes while they are being received.
+
+    Requests announcing a larger Content-Length are rejected before reading
+    the body; chunked bodies are counted as they arrive.
+    """
+
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            response = JSONResponse({"detail": upload_too_large().detail}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI re-raises HTTPExceptions from body parsing as-is
+                    raise upload_too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+app.add_middleware(MaxBodySizeMiddleware, max_bytes=MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES)
 
 # Allow CORS for local network
 app.add_middleware(
@@ -25,27 +125,192 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.post("/upload")
-async def upload_pdf(file: UploadFile = File(...)):
+def remove_file(path: str) -> None:
+    """Remove a temporary file, ignoring errors."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def run_ocr_job(pdf_path: str, job: Optional[Job] = None, progress: Optional[ProgressCallback] = None,
+                on_page: Optional[PageCallback] = None) -> str:
+    """Executor entry point: convert the PDF, then free its temp file and admission slot.
+
+    When a job is given, its progress and outcome are recorded on it.
+    """
+    try:
+        if job is not None:
+            progress = job.update_progress
+        timings: Dict[str, float] = {}
+        try:
+            with span("request", timings):
+                markdown = process_pdf_to_markdown(pdf_path, max_workers=DOCUMENT_OCR_WORKERS, progress=progress,
+                                                   on_page=on_page, cache=result_cache, tsv_cache=tsv_cache)
+        except Exception as e:
+            if job is not None:
+                job.fail(str(e))
+            raise
+        logger.info("Converted %s in %.2f s", job.filename if job is not None else "upload", timings["request"])
+        if job is not None:
+            job.finish(markdown)
+        return markdown
+    finally:
+        remove_file(pdf_path)
+        ocr_slots.release()
+
+def run_streaming_ocr_job(pdf_path: str, emit: Callable[[Optional[Dict]], None]) -> None:
+    """Executor entry point for streamed uploads.
+
+    Emits "progress" and "page" events while pages finish (all at once for
+    a cached document), then a "done" event with the whole document (or an
+    "error" event), then None.
+    """
+    def progress(pages_done: int, page_count: Optional[int]) -> None:
+        emit({"type": "progress", "pages_done": pages_done, "page_count": page_count})
+
+    def on_page(page_num: int, markdown: str) -> None:
+        emit({"type": "page", "page": page_num, "markdown": markdown})
+
+    try:
+        markdown = run_ocr_job(pdf_path, progress=progress, on_page=on_page)
+        emit({"type": "done", "markdown": markdown})
+    except Exception as e:
+        emit({"type": "error", "detail": f"Failed to process PDF: {str(e)}"})
+    finally:
+        emit(None)
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+def format_event(event: Dict, stream: str) -> str:
+    """Serialize an event as an NDJSON line or a Server-Sent Event."""
+    data = json.dumps(event)
+    if stream == "sse":
+        return f"event: {event['type']}\ndata: {data}\n\n"
+    return data + "\n"
+
+async def stream_events(events: asyncio.Queue, stream: str) -> AsyncIterator[str]:
+    while (event := await events.get()) is not None:
+        yield format_event(event, stream)
+
+def validate_upload(file: UploadFile) -> None:
     if not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are supported.")
-    if file.size and file.size > 50 * 1024 * 1024:
-        raise HTTPException(status_code=400, detail="File too large (max 50MB).")
-    try:
-        # Create a temporary file to store the uploaded PDF
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_pdf:
-            temp_pdf.write(await file.read())
-            temp_pdf_path = temp_pdf.name
+    if file.size and file.size > MAX_UPLOAD_BYTES:
+        raise upload_too_large()
 
-        # Process PDF using Tesseract-based solution
-        markdown = process_pdf_to_markdown(temp_pdf_path)
+def acquire_ocr_slot() -> None:
+    # Reject right away when the OCR queue is full instead of queueing without bound
+    if not ocr_slots.acquire(blocking=False):
+        raise HTTPException(status_code=503, detail="Server busy, try again later.", headers={"Retry-After": "10"})
 
-        # Clean up temporary file
+async def save_upload(file: UploadFile) -> str:
+    """Stream the uploaded PDF to a temporary file in chunks and return its path.
+
+    Raises a 413 as soon as more than MAX_UPLOAD_BYTES have been copied.
+    """
+    with span("upload"), tempfile.NamedTemporaryFile(delete=False, suffix='.pdf', dir=SCRATCH_ROOT) as temp_pdf:
         try:
-            os.remove(temp_pdf_path)
-        except:
-            pass
+            size = 0
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise upload_too_large()
+                temp_pdf.write(chunk)
+        except BaseException:
+            temp_pdf.close()
+            remove_file(temp_pdf.name)
+            raise
+        return temp_pdf.name
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+@app.get("/metrics")
+async def metrics():
+    """Stage timing histograms in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.post("/upload")
+async def upload_pdf(file: UploadFile = File(...), stream: Optional[str] = None):
+    """Convert a PDF to markdown.
+
+    With ?stream=ndjson or ?stream=sse the response is a stream of events
+    (see run_streaming_ocr_job) so clients can show pages as they finish.
+    """
+    validate_upload(file)
+    if stream is not None and stream not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="stream must be 'ndjson' or 'sse'.")
+    acquire_ocr_slot()
+    submitted = False
+    try:
+        temp_pdf_path = await save_upload(file)
+
+        # Process PDF using Tesseract-based solution; the executor job owns
+        # the temp file and the admission slot from here on
+        if stream is not None:
+            loop = asyncio.get_running_loop()
+            events: asyncio.Queue = asyncio.Queue()
+            ocr_executor.submit(run_streaming_ocr_job, temp_pdf_path,
+                                lambda event: loop.call_soon_threadsafe(events.put_nowait, event))
+            submitted = True
+            return StreamingResponse(stream_events(events, stream), media_type=STREAM_MEDIA_TYPES[stream],
+                                     headers={"Cache-Control": "no-cache"})
+
+        future = asyncio.get_running_loop().run_in_executor(ocr_executor, run_ocr_job, temp_pdf_path)
+        submitted = True
+        markdown = await future
 
         return {"markdown": markdown}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to process PDF: {str(e)}")
+    finally:
+        if not submitted:
+            ocr_slots.release()
+
+@app.post("/jobs", status_code=202)
+async def create_job(file: UploadFile = File(...)):
+    """Queue a PDF for conversion and return its job id without waiting for OCR."""
+    validate_upload(file)
+    acquire_ocr_slot()
+    temp_pdf_path = None
+    job = None
+    try:
+        temp_pdf_path = await save_upload(file)
+        job = jobs.create(file.filename)
+        ocr_executor.submit(run_ocr_job, temp_pdf_path, job)
+    except Exception as e:
+        if job is not None:
+            # Never picked up by the executor, so nothing else would finish it
+            job.fail(f"Failed to queue PDF: {str(e)}")
+        if temp_pdf_path:
+            remove_file(temp_pdf_path)
+        ocr_slots.release()
+        if isinstance(e, HTTPException):
+            raise
+        raise HTTPException(status_code=500, detail=f"Failed to queue PDF: {str(e)}")
+    return job.to_dict()
+
+def get_job_or_404(job_id: str) -> Job:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    return get_job_or_404(job_id).to_dict()
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = get_job_or_404(job_id)
+    if job.status == "failed":
+        raise HTTPException(status_code=409, detail=f"Job failed: {job.error}")
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}.")
+    return {"markdown": job.markdown}
@@ -0,0 +1,77 @@
+"""
+Timing instrumentation for the OCR pipeline.
+Stage durations are recorded with span() into histograms that GET /metrics
+exports in the Prometheus text format.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds (seconds) of the histogram buckets, from fast layout passes
+# to whole multi-page documents
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+class Histogram:
+    """Thread-safe histogram with one label (e.g. stage), in the Prometheus data model."""
+
+    def __init__(self, name: str, help_text: str, label: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+        # label value -> (per-bucket counts, sum, count)
+        self._series: Dict[str, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value: str, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, totals = self._series.setdefault(label_value, ([0] * (len(self.buckets) + 1), [0.0, 0]))
+            counts[index] += 1
+            totals[0] += value
+            totals[1] += 1
+
+    def render(self) -> List[str]:
+        """Return the exposition lines for this histogram (cumulative buckets)."""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((value, list(counts), list(totals)) for value, (counts, totals) in self._series.items())
+        for label_value, counts, (total, count) in series:
+            label = f'{self.label}="{label_value}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{label}}} {total}")
+            lines.append(f"{self.name}_count{{{label}}} {count}")
+        return lines
+
+STAGE_SECONDS = Histogram(
+    "pdfocr_stage_seconds",
+    "Time spent per pipeline stage: upload and request per document; rasterize, ocr, parse, layout and format per page.",
+    "stage",
+)
+
+@contextmanager
+def span(stage: str, timings: Optional[Dict[str, float]] = None) -> Iterator[None]:
+    """Time the enclosed block and record it in STAGE_SECONDS under stage.
+
+    If timings is given, the duration is also added to timings[stage], so
+    callers can log a breakdown of one page or request.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(stage, elapsed)
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return "\n".join(STAGE_SECONDS.render()) + "\n"
@@ -1,15 +1,200 @@
 
 """
 PDF processing module using Tesseract for OCR and column detection.
-Replaces PyMuPDF and Pillow dependencies.
+Pages are rendered with pdftoppm. PyMuPDF is optional: when installed it
+counts pages, reads PDF text layers (on by default) and renders adaptive
+scale probes, and it is needed for the in-memory rasterizer,
+native-resolution scans, region OCR and decoding page images for the PSM
+ensemble.
 """
 
+import hashlib
+import json
+import logging
 import subprocess
 import tempfile
 import os
-from typing import List, Dict, Optional
+import threading
+import time
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from dataclasses import asdict, dataclass
+from itertools import accumulate
+from typing import Callable, List, Dict, Iterator, Optional, Tuple, Union
 
-def pdf_to_png(pdf_path: str, output_dir: str) -> List[str]:
+try:
+    import pymupdf as fitz
+except ImportError:
+    try:
+        import fitz  # PyMuPDF < 1.24.3
+    except ImportError:
+        fitz = None
+
+import tesseract_api
+from cache import ResultCache, file_sha256, make_key
+from metrics import span
+from words import WordTable, hocr_page_size, line_texts, merge_words, parse_hocr, parse_tsv
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on concurrent Tesseract runs per document. Each run is a separate
+# process, so a thread pool is enough to keep all cores busy.
+MAX_OCR_WORKERS = int(os.environ.get("PDFOCR_MAX_WORKERS", os.cpu_count() or 1))
+
+# Pages rendered ahead of the OCR workers, per worker. Rendering pauses while
+# the window is full, so long documents (bound archives with hundreds of
+# pages) are processed in bounded memory and scratch space.
+PAGES_IN_FLIGHT_PER_WORKER = 2
+
+# Parent directory for per-job scratch directories. Point this at a tmpfs
+# mount (e.g. /dev/shm) to keep page images off disk. None means the system
+# temp directory.
+SCRATCH_ROOT = os.environ.get("PDFOCR_SCRATCH_DIR") or None
+
+# OCR engine: "cli" runs the tesseract binary per page, "tesserocr" reuses
+# in-process libtesseract handles (see tesseract_api).
+OCR_ENGINE = os.environ.get("PDFOCR_ENGINE", "cli")
+
+# Rasterizer: "pdftoppm" writes a PNG file per page, "pymupdf" renders pages
+# to in-memory pixmaps that go to Tesseract without PNG encoding.
+RASTERIZER = os.environ.get("PDFOCR_RASTERIZER", "pdftoppm")
+
+# Use the PDF's own text layer instead of OCR for pages that have real text
+# (requires PyMuPDF). A page qualifies with at least TEXT_LAYER_MIN_WORDS
+# words of which nearly all characters decode to real text (broken font
+# encodings give U+FFFD or control characters). If a scan covers most of the
+# page, the words must also cover TEXT_LAYER_MIN_COVERAGE of it; a few words
+# over a full-page image are usually a stamp or caption.
+TEXT_LAYER = os.environ.get("PDFOCR_TEXT_LAYER", "1") == "1"
+TEXT_LAYER_MIN_WORDS = 10
+TEXT_LAYER_MIN_VALID_CHARS = 0.95
+TEXT_LAYER_MIN_COVERAGE = 0.02
+
+# OCR scanned pages from the embedded image at native resolution instead of
+# re-rendering the page (requires PyMuPDF). Only pages that consist of a single
+# upright image covering at least NATIVE_IMAGE_MIN_COVERAGE of the page qualify;
+# composite pages are rendered as usual.
+NATIVE_IMAGES = os.environ.get("PDFOCR_NATIVE_IMAGES", "0") == "1"
+NATIVE_IMAGE_MIN_COVERAGE = 0.9
+# Embedded image formats Tesseract (leptonica) can read directly
+NATIVE_IMAGE_FORMATS = {"jpeg", "jpg", "png", "tif", "tiff", "bmp", "pnm", "pbm", "pgm", "ppm"}
+
+# Pick the render scale per page from the size of its text instead of using
+# OcrOptions.scale for every page. A grayscale probe at PROBE_SCALE gives the
+# x-height of the body text; the page is then rendered so that it comes out
+# near ADAPTIVE_TARGET_X_HEIGHT pixels, the range where Tesseract's LSTM
+# models are most accurate. Large-type pages get a smaller render (less OCR
+# time), dense small print a larger one (fewer misreads).
+ADAPTIVE_SCALE = os.environ.get("PDFOCR_ADAPTIVE_SCALE", "0") == "1"
+PROBE_SCALE = 800
+ADAPTIVE_TARGET_X_HEIGHT = 20
+ADAPTIVE_MIN_SCALE = 800
+ADAPTIVE_MAX_SCALE = 3200
+# Rendered sizes are rounded to this step, so pages with similar text sizes
+# get identical renders (and TSV cache hits)
+ADAPTIVE_SCALE_STEP = 100
+
+# Column gutters are vertical whitespace at least COLUMN_GAP_MIN_HEIGHTS
+# median word heights (and COLUMN_GAP_MIN_PIXELS) wide, wider than the
+# indent after list bullets. Up to COLUMN_GAP_MAX_OVERLAP of the words may
+# cross a gutter, so a spanning table caption or a stray OCR speck doesn't
+# merge two columns. Gutters are looked for in bands of the page separated
+# by COLUMN_BAND_GAP_HEIGHTS of blank rows.
+COLUMN_GAP_MIN_HEIGHTS = 2.5
+COLUMN_GAP_MIN_PIXELS = 10
+COLUMN_GAP_MAX_OVERLAP = 0.03
+COLUMN_BAND_GAP_HEIGHTS = 1.0
+# A column needs at least this many words; thinner ones (a stray word or
+# two next to a gutter-like gap) are merged into their neighbour
+COLUMN_MIN_WORDS = 3
+
+# Region OCR: a page is normally one Tesseract run, so a single-page upload
+# uses one core. With region OCR, Tesseract's layout analysis (word boxes,
+# no recognition) finds the header, columns and footer that detect_columns
+# produces; those regions are then cropped from the image and OCR'd
+# concurrently, each with its REGION_PSM. Pages with a single region are
+# OCR'd whole. Crops are padded by REGION_MARGIN_HEIGHTS text heights so
+# strokes at the edge aren't cut; a word belongs to the region its center
+# falls in. Needs tesserocr for the layout analysis and PyMuPDF to decode
+# and crop page images.
+REGION_OCR = os.environ.get("PDFOCR_REGION_OCR", "0") == "1"
+# Layout words aren't read; detect_columns only needs their text to be
+# alphanumeric to count them as words
+LAYOUT_WORD = "w"
+REGION_PSM = {
+    "header": 6,  # Titles and intro text: one uniform block
+    "column": 6,  # Ingredient lists: one uniform block
+    "footer": 4,  # Steps: one column of text of variable sizes
+}
+REGION_MARGIN_HEIGHTS = 0.5
+
+# PSM ensemble: besides OcrOptions.psm, OCR each page with these page
+# segmentation modes at the same time (e.g. "6,11": uniform block and
+# sparse text) and keep the most confident reading of every word box (see
+# words.merge_words). The extra runs share one decoded page image. The
+# primary run always completes; the others share a budget of
+# ENSEMBLE_BUDGET seconds from the start of the page, are stopped when it
+# runs out, and whatever finished by then is merged. Can't be combined
+# with region OCR.
+ENSEMBLE_PSMS = tuple(int(psm) for psm in os.environ.get("PDFOCR_ENSEMBLE_PSMS", "").split(",") if psm.strip())
+ENSEMBLE_BUDGET = float(os.environ.get("PDFOCR_ENSEMBLE_BUDGET", "10"))
+
+# Tesseract output parsed for the page's words: "tsv", or "hocr", which is
+# streamed through words.iter_hocr and also carries line baselines
+OCR_FORMATS = ("tsv", "hocr")
+OCR_FORMAT = os.environ.get("PDFOCR_OCR_FORMAT", "tsv")
+
+@dataclass(frozen=True)
+class OcrOptions:
+    """Parameters of the rasterize/OCR/layout pipeline."""
+    psm: int = 3          # Fully automatic page segmentation
+    oem: int = 1          # LSTM OCR engine
+    lang: str = "nld"     # Dutch language
+    scale: int = 1200     # Rendered page height in pixels
+    num_columns: Optional[int] = None  # None: infer from the page
+    engine: str = OCR_ENGINE
+    rasterizer: str = RASTERIZER
+    text_layer: bool = TEXT_LAYER
+    native_images: bool = NATIVE_IMAGES
+    adaptive_scale: bool = ADAPTIVE_SCALE
+    region_ocr: bool = REGION_OCR
+    ensemble_psms: Tuple[int, ...] = ENSEMBLE_PSMS
+    ocr_format: str = OCR_FORMAT
+
+    def __post_init__(self):
+        if self.ocr_format not in OCR_FORMATS:
+            raise ValueError(f"Unknown OCR output format {self.ocr_format!r} (PDFOCR_OCR_FORMAT), "
+                             f"use one of {', '.join(OCR_FORMATS)}")
+        if self.region_ocr and self.ensemble_psms:
+            raise ValueError("Region OCR and the PSM ensemble can't be combined "
+                             "(PDFOCR_REGION_OCR, PDFOCR_ENSEMBLE_PSMS)")
+
+@dataclass(frozen=True)
+class RawImage:
+    """Uncompressed 8-bit page raster held in memory (gray or RGB)."""
+    samples: bytes
+    width: int
+    height: int
+    channels: int
+
+    def to_pnm(self) -> bytes:
+        """Encode as binary PGM/PPM, which Tesseract reads without decompression."""
+        magic = "P5" if self.channels == 1 else "P6"
+        return f"{magic}\n{self.width} {self.height}\n255\n".encode("ascii") + self.samples
+
+    def sha256(self) -> str:
+        digest = hashlib.sha256(f"{self.width}x{self.height}x{self.channels}:".encode("ascii"))
+        digest.update(self.samples)
+        return digest.hexdigest()
+
+# A rendered page: a PNG file path or an in-memory raster
+PageImage = Union[str, RawImage]
+# What the pipeline gets per page: an image to OCR, or the words taken from
+# the PDF's own text layer
+PageSource = Union[PageImage, WordTable]
+
+def pdf_to_png(pdf_path: str, output_dir: str, scale: int = 1200) -> List[str]:
     """Convert PDF to PNG images using pdftoppm (poppler-utils)."""
     png_files = []
     try:
@@ -21,7 +206,7 @@ def pdf_to_png(pdf_path: str, output_dir: str) -> List[str]:
         cmd = [
             "pdftoppm",
             "-png",
-            "-scale-to", "1200",  # Scale to 1200 pixels height for reasonable resolution
+            "-scale-to", str(scale),  # Scale to 1200 pixels height by default for reasonable resolution
             pdf_path,
             output_pattern
         ]
@@ -32,156 +217,592 @@ def pdf_to_png(pdf_path: str, output_dir: str) -> List[str]:
             raise Exception(f"PDF conversion failed: {result.stderr}")
 
 
-        # Find all generated PNG files
-        for i in range(1, 100):  # Support up to 99 pages
-            png_file = f"{output_pattern}-{i}.png"
-            if os.path.exists(png_file):
-                png_files.append(png_file)
-            else:
-                break
+        # Collect the generated PNG files in page order. pdftoppm zero-pads
+        # the page number to the width of the last one (page-001.png for
+        # documents of 100+ pages), so parse the numbers instead of guessing
+        # names.
+        numbered = []
+        for name in os.listdir(output_dir):
+            stem, ext = os.path.splitext(name)
+            number = stem[len("page-"):]
+            if ext == ".png" and stem.startswith("page-") and number.isdigit():
+                numbered.append((int(number), os.path.join(output_dir, name)))
+        png_files = [png_file for _, png_file in sorted(numbered)]
 
     except Exception as e:
-        print(f"Error converting PDF to PNG: {e}")
+        logger.error("Error converting PDF to PNG: %s", e)
 
     return png_files
 
-def run_tesseract_tsv(png_file: str) -> Optional[str]:
-    """Run Tesseract on a PNG file and return TSV output."""
+def pdf_page_count(pdf_path: str) -> Optional[int]:
+    """Return the number of pages in a PDF using PyMuPDF or pdfinfo (poppler-utils)."""
+    if fitz is not None:
+        try:
+            with fitz.open(pdf_path) as doc:
+                return doc.page_count
+        except Exception as e:
+            logger.error("Error reading PDF page count: %s", e)
+            return None
     try:
-        # Run Tesseract with TSV output
+        result = subprocess.run(["pdfinfo", pdf_path], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        logger.error("Error reading PDF page count: %s", e)
+        return None
+
+    for line in result.stdout.splitlines():
+        if line.startswith("Pages:"):
+            return int(line.split(":", 1)[1])
+    return None
+
+def render_page(pdf_path: str, page_num: int, output_dir: str, scale: int = 1200,
+                gray: bool = False) -> Optional[str]:
+    """Render a single PDF page to PNG (or grayscale PGM) using pdftoppm and return the file path."""
+    os.makedirs(output_dir, exist_ok=True)
+    output_base = os.path.join(output_dir, f"page-{page_num}")
+    cmd = [
+        "pdftoppm",
+        "-gray" if gray else "-png",
+        "-scale-to", str(scale),
+        "-f", str(page_num),
+        "-l", str(page_num),
+        "-singlefile",  # Write output_base.png without a page number suffix
+        pdf_path,
+        output_base
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        logger.error("Error rendering page %d: %s", page_num, result.stderr)
+        return None
+    return output_base + (".pgm" if gray else ".png")
+
+def read_pgm(path: str) -> RawImage:
+    """Load a binary PGM file (as written by pdftoppm -gray) into a RawImage."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, width, height, maxval = data.split(maxsplit=4)[:4]
+    if magic != b"P5" or maxval != b"255":
+        raise ValueError(f"Unsupported PGM file: {path}")
+    width, height = int(width), int(height)
+    # The header ends with a single whitespace byte; the samples fill the rest
+    return RawImage(data[-width * height:], width, height, 1)
+
+def render_pixmap(page, scale: int = 1200, gray: bool = False) -> RawImage:
+    """Render a PyMuPDF page to an in-memory RGB (or grayscale) raster.
+
+    Like pdftoppm -scale-to, the longer page side is scaled to scale pixels.
+    """
+    zoom = scale / max(page.rect.width, page.rect.height)
+    colorspace = fitz.csGRAY if gray else fitz.csRGB
+    pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=colorspace, alpha=False)
+    return RawImage(pixmap.samples, pixmap.width, pixmap.height, pixmap.n)
+
+def load_raster(image: PageImage) -> Optional[RawImage]:
+    """Decode a page image file into a gray or RGB RawImage with PyMuPDF (None without PyMuPDF)."""
+    if isinstance(image, RawImage):
+        return image
+    if fitz is None:
+        return None
+    pixmap = fitz.Pixmap(image)
+    if pixmap.alpha:
+        pixmap = fitz.Pixmap(pixmap, 0)
+    if pixmap.n not in (1, 3):
+        pixmap = fitz.Pixmap(fitz.csRGB, pixmap)
+    return RawImage(pixmap.samples, pixmap.width, pixmap.height, pixmap.n)
+
+def resize_raster(image: RawImage, scale: int) -> RawImage:
+    """Resample a raster so its longer side is scale pixels."""
+    colorspace = fitz.csGRAY if image.channels == 1 else fitz.csRGB
+    pixmap = fitz.Pixmap(colorspace, image.width, image.height, image.samples, 0)
+    zoom = scale / max(image.width, image.height)
+    pixmap = fitz.Pixmap(pixmap, round(image.width * zoom), round(image.height * zoom), None)
+    return RawImage(pixmap.samples, pixmap.width, pixmap.height, pixmap.n)
+
+def crop_raster(image: RawImage, box: Tuple[int, int, int, int]) -> RawImage:
+    """Copy the (x0, y0, x1, y1) rectangle out of a raster."""
+    x0, y0, x1, y1 = box
+    stride = image.width * image.channels
+    start, end = x0 * image.channels, x1 * image.channels
+    samples = memoryview(image.samples)
+    rows = b''.join(samples[y * stride + start:y * stride + end] for y in range(y0, y1))
+    return RawImage(rows, x1 - x0, y1 - y0, image.channels)
+
+def otsu_threshold(samples: bytes) -> int:
+    """Return the gray level that best separates dark and light 8-bit samples (Otsu's method)."""
+    histogram = Counter(samples)
+    total = len(samples)
+    total_sum = sum(level * count for level, count in histogram.items())
+    dark_count = dark_sum = 0
+    best_variance, threshold = -1.0, 127
+    for level in range(256):
+        count = histogram.get(level, 0)
+        dark_count += count
+        dark_sum += level * count
+        light_count = total - dark_count
+        if dark_count == 0:
+            continue
+        if light_count == 0:
+            break
+        mean_difference = dark_sum / dark_count - (total_sum - dark_sum) / light_count
+        variance = dark_count * light_count * mean_difference ** 2
+        if variance > best_variance:
+            best_variance, threshold = variance, level
+    return threshold
+
+def estimate_x_height(image: RawImage, strips: int = 4) -> Optional[float]:
+    """Estimate the x-height in pixels of the body text on a grayscale raster.
+
+    The image is binarized and cut into vertical strips, so lines of
+    side-by-side columns don't merge. In each strip, runs of rows containing
+    ink are text lines; within a line, the rows with at least half of its
+    peak ink form the x-height band (ascenders and descenders are sparse).
+    Returns the mean over the middle half of all lines, or None if the page
+    has too few lines to tell.
+    """
+    threshold = otsu_threshold(image.samples)
+    ink = image.samples.translate(bytes(1 if level <= threshold else 0 for level in range(256)))
+    width, height = image.width, image.height
+    strip_width = width // strips
+    min_ink = max(2, strip_width // 200)
+    # Taller runs are pictures, rules or merged paragraphs, not text lines
+    max_line_height = height // 10
+
+    x_heights = []
+    for strip in range(strips):
+        x0 = strip * strip_width
+        profile = [ink.count(1, row + x0, row + x0 + strip_width) for row in range(0, width * height, width)]
+        y = 0
+        while y < height:
+            if profile[y] < min_ink:
+                y += 1
+                continue
+            start = y
+            while y < height and profile[y] >= min_ink:
+                y += 1
+            line = profile[start:y]
+            if 3 <= len(line) <= max_line_height:
+                peak = max(line)
+                x_heights.append(sum(1 for count in line if count * 2 >= peak))
+
+    if len(x_heights) < 3:
+        return None
+    x_heights.sort()
+    quarter = len(x_heights) // 4
+    middle = x_heights[quarter:len(x_heights) - quarter]
+    return sum(middle) / len(middle)
+
+def adaptive_scale(x_height: float, probe_scale: int = PROBE_SCALE) -> int:
+    """Render scale that brings text with x_height pixels at probe_scale to ADAPTIVE_TARGET_X_HEIGHT."""
+    scale = probe_scale * ADAPTIVE_TARGET_X_HEIGHT / x_height
+    scale = round(scale / ADAPTIVE_SCALE_STEP) * ADAPTIVE_SCALE_STEP
+    return max(ADAPTIVE_MIN_SCALE, min(ADAPTIVE_MAX_SCALE, scale))
+
+def page_render_scale(pdf_path: str, page_num: int, output_dir: str, doc=None,
+                      default_scale: int = 1200) -> int:
+    """Probe a page at PROBE_SCALE and return the render scale for its text size.
+
+    Uses PyMuPDF when a document is given, pdftoppm otherwise. Returns
+    default_scale if the page has no measurable text.
+    """
+    if doc is not None:
+        probe = render_pixmap(doc[page_num - 1], PROBE_SCALE, gray=True)
+    else:
+        probe_file = render_page(pdf_path, page_num, output_dir, PROBE_SCALE, gray=True)
+        if probe_file is None:
+            return default_scale
+        try:
+            probe = read_pgm(probe_file)
+        finally:
+            os.remove(probe_file)
+
+    x_height = estimate_x_height(probe)
+    return adaptive_scale(x_height) if x_height else default_scale
+
+def text_layer_words(page, scale: int = 1200) -> Optional[WordTable]:
+    """Return the words of a PyMuPDF page's text layer, or None if the page needs OCR.
+
+    Coordinates are in pixels of the page rendered at scale, like OCR'd
+    words, so detect_columns and format_markdown work unchanged.
+    """
+    words = [w for w in page.get_text("words") if w[4].strip()]
+    if len(words) < TEXT_LAYER_MIN_WORDS:
+        return None
+
+    text = ''.join(w[4] for w in words)
+    valid_chars = sum(1 for c in text if c.isprintable() and c != '\ufffd')
+    if valid_chars < len(text) * TEXT_LAYER_MIN_VALID_CHARS:
+        return None
+
+    page_area = page.rect.width * page.rect.height
+    image_area = sum((fitz.Rect(info["bbox"]) & page.rect).get_area() for info in page.get_image_info())
+    if image_area >= page_area * 0.5:
+        text_area = sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1, *_ in words)
+        if text_area < page_area * TEXT_LAYER_MIN_COVERAGE:
+            return None
+
+    zoom = scale / max(page.rect.width, page.rect.height)
+    table = WordTable()
+    for x0, y0, x1, y1, text, block_no, line_no, _ in words:
+        table.append(round(x0 * zoom), round(y0 * zoom), round((x1 - x0) * zoom), round((y1 - y0) * zoom),
+                     text, conf=100, block=block_no + 1, par=1, line=line_no + 1)
+    return table
+
+def extract_page_image(doc, page, output_dir: str) -> Optional[str]:
+    """Write a scanned page's embedded image to output_dir at native resolution.
+
+    Returns the image path, or None if the page is not a single upright image
+    covering the page (or the image can't be passed to Tesseract as is), in
+    which case the page should be rendered instead.
+    """
+    if page.rotation or len(page.get_images()) != 1:
+        return None
+    infos = page.get_image_info(xrefs=True)
+    if len(infos) != 1 or not infos[0]["xref"]:
+        return None
+    info = infos[0]
+
+    # Rotated or mirrored placements would reach Tesseract the wrong way up
+    a, b, c, d, _, _ = info["transform"]
+    if b or c or a <= 0 or d <= 0:
+        return None
+    page_area = page.rect.width * page.rect.height
+    if (fitz.Rect(info["bbox"]) & page.rect).get_area() < page_area * NATIVE_IMAGE_MIN_COVERAGE:
+        return None
+    # Text or vector graphics drawn over the scan would be lost
+    if page.get_text("words") or page.get_drawings():
+        return None
+
+    extracted = doc.extract_image(info["xref"])
+    if (not extracted or extracted["ext"] not in NATIVE_IMAGE_FORMATS
+            or extracted.get("smask") or extracted.get("colorspace") not in (1, 3)):
+        return None
+
+    os.makedirs(output_dir, exist_ok=True)
+    image_path = os.path.join(output_dir, f"page-{page.number + 1}.{extracted['ext']}")
+    with open(image_path, 'wb') as f:
+        f.write(extracted["image"])
+    return image_path
+
+def iter_pdf_pages(pdf_path: str, output_dir: str, page_count: Optional[int] = None,
+                   options: OcrOptions = OcrOptions()) -> Iterator[Tuple[int, PageSource]]:
+    """Rasterize a PDF one page at a time, yielding (page_num, source).
+
+    Each page is yielded as soon as it is rendered, so OCR can start before
+    the rest of the document is rasterized. With the "pymupdf" rasterizer
+    images are RawImages kept in memory; otherwise they are image files in
+    output_dir. With options.text_layer, pages that carry usable text are
+    not rendered; their source is the WordTable from text_layer_words.
+    With options.native_images, scanned pages are yielded as their embedded
+    image file at native resolution. With options.adaptive_scale, each
+    rendered page is sized for its text by page_render_scale instead of
+    using options.scale. Falls back to a single pdf_to_png run when the
+    page count can't be determined.
+    """
+    scale = options.scale
+    rasterizer = options.rasterizer
+    doc = None
+    if fitz is not None and (rasterizer == "pymupdf" or options.text_layer or options.native_images
+                             or options.adaptive_scale):
+        doc = fitz.open(pdf_path)
+    elif rasterizer == "pymupdf":
+        logger.warning("PyMuPDF is not installed, rendering with pdftoppm")
+
+    try:
+        if page_count is None:
+            page_count = doc.page_count if doc is not None else pdf_page_count(pdf_path)
+        if page_count is None:
+            for i, png_file in enumerate(pdf_to_png(pdf_path, output_dir, scale)):
+                yield i + 1, png_file
+            return
+
+        for page_num in range(1, page_count + 1):
+            with span("rasterize"):
+                source = _page_source(pdf_path, page_num, output_dir, doc, options)
+            if source is not None:
+                yield page_num, source
+    finally:
+        if doc is not None:
+            doc.close()
+
+def _page_source(pdf_path: str, page_num: int, output_dir: str, doc,
+                 options: OcrOptions) -> Optional[PageSource]:
+    """Produce one page's source for iter_pdf_pages, or None if rendering failed."""
+    if doc is not None and options.text_layer:
+        words = text_layer_words(doc[page_num - 1], options.scale)
+        if words is not None:
+            return words
+
+    if doc is not None and options.native_images:
+        image_path = extract_page_image(doc, doc[page_num - 1], output_dir)
+        if image_path is not None:
+            return image_path
+
+    page_scale = options.scale
+    if options.adaptive_scale:
+        page_scale = page_render_scale(pdf_path, page_num, output_dir, doc, options.scale)
+
+    if doc is not None and options.rasterizer == "pymupdf":
+        return render_pixmap(doc[page_num - 1], page_scale)
+    return render_page(pdf_path, page_num, output_dir, page_scale)
+
+def image_sha256(image: PageImage) -> str:
+    """Content hash of a page image file or in-memory raster."""
+    return image.sha256() if isinstance(image, RawImage) else file_sha256(image)
+
+def run_tesseract_tsv(image: PageImage, omp_thread_limit: Optional[int] = None,
+                      psm: int = 3, oem: int = 1, lang: str = "nld",
+                      cache: Optional[ResultCache] = None, engine: str = "cli",
+                      timeout: Optional[float] = None) -> Optional[str]:
+    """Run Tesseract on a PNG file or in-memory RawImage and return TSV output (see run_tesseract)."""
+    return run_tesseract(image, omp_thread_limit, psm, oem, lang, cache, engine, timeout)
+
+def run_tesseract(image: PageImage, omp_thread_limit: Optional[int] = None,
+                  psm: int = 3, oem: int = 1, lang: str = "nld",
+                  cache: Optional[ResultCache] = None, engine: str = "cli",
+                  timeout: Optional[float] = None, output_format: str = "tsv") -> Optional[str]:
+    """Run Tesseract on a PNG file or in-memory RawImage and return its output_format ("tsv" or "hocr") output.
+
+    engine "cli" spawns the tesseract binary; "tesserocr" uses a pooled
+    in-process API handle, avoiding the per-page process start and model
+    load. It falls back to the CLI when tesserocr is not installed.
+
+    If omp_thread_limit is given, OMP_THREAD_LIMIT is set for the Tesseract
+    process so several concurrent runs don't oversubscribe the CPU. For the
+    in-process engine, set OMP_THREAD_LIMIT in the server's environment.
+
+    With a cache, the raw output is stored under the image's SHA-256 plus
+    psm/oem/lang (and the format, if not TSV), so later layout or
+    formatting changes can reuse it.
+
+    With a timeout (seconds), recognition is stopped when it runs longer,
+    and None is returned.
+    """
+    cache_key = None
+    if cache is not None:
+        params = {"psm": psm, "oem": oem, "lang": lang}
+        if output_format != "tsv":
+            params["format"] = output_format
+        cache_key = make_key(image_sha256(image), params)
+        output = cache.get(cache_key)
+        if output is not None:
+            return output
+
+    if engine == "tesserocr" and tesseract_api.available():
+        output = tesseract_api.image_to_text(image, psm=psm, oem=oem, lang=lang, timeout=timeout,
+                                             output_format=output_format)
+    else:
+        if engine != "cli":
+            logger.warning("OCR engine %r not available, using the tesseract CLI", engine)
+        output = _run_tesseract_cli(image, omp_thread_limit, psm, oem, lang, timeout, output_format)
+
+    if cache_key is not None and output is not None:
+        cache.put(cache_key, output)
+    return output
+
+def _run_tesseract_cli(image: PageImage, omp_thread_limit: Optional[int], psm: int, oem: int, lang: str,
+                       timeout: Optional[float] = None, output_format: str = "tsv") -> Optional[str]:
+    """Run the tesseract binary on a page image and return its TSV or hOCR output.
+
+    In-memory rasters are piped to stdin as uncompressed PNM.
+    """
+    env = None
+    if omp_thread_limit is not None:
+        env = dict(os.environ, OMP_THREAD_LIMIT=str(omp_thread_limit))
+    stdin_data = image.to_pnm() if isinstance(image, RawImage) else None
+    try:
+        # Run Tesseract with TSV (or hOCR) output
         cmd = [
             "tesseract",
-            png_file,
+            "stdin" if stdin_data is not None else image,
             "stdout",
-            "--psm", "3",  # Fully automatic page segmentation
-            "--oem", "1",  # LSTM OCR engine
-            "-l", "nld",   # Dutch language
-            "tsv"
+            "--psm", str(psm),  # Page segmentation mode (3: fully automatic)
+            "--oem", str(oem),  # OCR engine mode (1: LSTM)
+            "-l", lang,         # Language (nld: Dutch)
+            output_format
         ]
-        print(f"DEBUG: Running Tesseract command: {' '.join(cmd)}")
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        logger.debug("Running Tesseract command: %s", cmd)
+        result = subprocess.run(cmd, input=stdin_data, capture_output=True, check=True, env=env, timeout=timeout)
+        stdout = result.stdout.decode("utf-8", errors="replace")
 
-        print(f"DEBUG: Tesseract return code: {result.returncode}")
-        print(f"DEBUG: Tesseract stdout length: {len(result.stdout)}")
-        print(f"DEBUG: Tesseract stderr: {result.stderr}")
+        logger.debug("Tesseract returned %d bytes of %s, stderr: %r", len(stdout), output_format, result.stderr)
 
-        return result.stdout
+        return stdout
     except subprocess.CalledProcessError as e:
-        print(f"Tesseract failed: {e}")
-        print(f"Tesseract stderr: {e.stderr}")
+        logger.error("Tesseract failed: %s\n%s", e, e.stderr.decode('utf-8', errors='replace'))
+        return None
+    except subprocess.TimeoutExpired:
+        logger.warning("Tesseract --psm %d stopped after %.1f s", psm, timeout)
         return None
 
 def parse_tsv_output(tsv_data: str) -> List[Dict]:
-    """Parse Tesseract TSV output into structured word data."""
-    lines = tsv_data.strip().split('\n')
-    word_data = []
+    """Parse Tesseract TSV output into structured word data (one dict per word).
+
+    The pipeline itself uses the columnar words.parse_tsv; this is for
+    callers that want plain records.
+    """
+    return parse_tsv(tsv_data).to_dicts()
+
+def parse_ocr_output(output: str, output_format: str = "tsv") -> WordTable:
+    """Parse Tesseract TSV or hOCR output into a WordTable."""
+    return parse_hocr(output) if output_format == "hocr" else parse_tsv(output)
+
+def ocr_page_size(output: str, output_format: str = "tsv") -> Optional[Tuple[int, int]]:
+    """Return the (width, height) of the OCR'd image from TSV or hOCR output."""
+    return hocr_page_size(output) if output_format == "hocr" else tsv_page_size(output)
 
-    for line in lines:
+def tsv_page_size(tsv_data: str) -> Optional[Tuple[int, int]]:
+    """Return the (width, height) of the OCR'd image from the TSV page-level row."""
+    for line in tsv_data.split('\n'):
         parts = line.split('\t')
-        if len(parts) >= 11:
-            # Skip header line (where first part is not a number)
-            if not parts[0].isdigit():
-                continue
+        if len(parts) >= 10 and parts[0] == '1':
             try:
-                level = int(parts[0])
-                if level == 5:  # Word level
-                    word = {
-                        'level': level,
-                        'page_num': int(parts[1]),
-                        'block_num': int(parts[2]),
-                        'par_num': int(parts[3]),
-                        'line_num': int(parts[4]),
-                        'word_num': int(parts[5]),
-                        'left': int(parts[6]),
-                        'top': int(parts[7]),
-                        'width': int(parts[8]),
-                        'height': int(parts[9]),
-                        'conf': int(parts[10]),
-                        'text': parts[11] if len(parts) > 11 else ''
-                    }
-                    word_data.append(word)
+                return int(parts[8]), int(parts[9])
             except ValueError:
-                continue
+                return None
+    return None
+
+def column_gutters(words: WordTable, min_gap: float, max_overlap: int = 0) -> List[Tuple[int, int]]:
+    """Return the (start, end) x ranges of vertical whitespace between words, left to right.
+
+    Builds the horizontal occupancy profile of the word boxes (how many
+    words cover each x) with a difference array and a prefix sum, then
+    finds the runs where at most max_overlap words cover x that are at
+    least min_gap wide and have words on both sides. The max_overlap
+    tolerance smooths out stray words or OCR specks that bridge a gutter.
+    """
+    if not words:
+        return []
+    origin = min(words.left)
+    diff = [0] * (max(left + max(width, 1) for left, width in zip(words.left, words.width)) - origin + 1)
+    for left, width in zip(words.left, words.width):
+        diff[left - origin] += 1
+        diff[left - origin + max(width, 1)] -= 1
+
+    gutters = []
+    gap_start = None
+    for x, occupancy in enumerate(accumulate(diff)):
+        if occupancy <= max_overlap:
+            if gap_start is None:
+                gap_start = x
+        elif gap_start is not None:
+            if x - gap_start >= min_gap:
+                gutters.append((origin + gap_start, origin + x))
+            gap_start = None
+    # A run reaching the right edge has no words after it, so it isn't a gutter
+    return gutters
+
+def merge_thin_columns(words: WordTable, gutters: List[Tuple[int, int]],
+                       min_words: int = COLUMN_MIN_WORDS) -> List[Tuple[int, int]]:
+    """Drop gutters until every column between them has at least min_words words.
+
+    A thin column is merged into the neighbour across the narrower of its
+    gutters.
+    """
+    while gutters:
+        boundaries = [(start + end) / 2 for start, end in gutters]
+        counts = [0] * (len(gutters) + 1)
+        for left, width in zip(words.left, words.width):
+            counts[bisect_right(boundaries, left + width / 2)] += 1
+        thin = min(range(len(counts)), key=counts.__getitem__)
+        if counts[thin] >= min_words:
+            break
+        drop = min((i for i in (thin - 1, thin) if 0 <= i < len(gutters)),
+                   key=lambda i: gutters[i][1] - gutters[i][0])
+        gutters = gutters[:drop] + gutters[drop + 1:]
+    return gutters
+
+def text_bands(words: WordTable, min_gap: float) -> List[List[int]]:
+    """Split words sorted by top into horizontal bands separated by at least min_gap of empty rows."""
+    bands = []
+    bottom = None
+    for row, (top, height) in enumerate(zip(words.top, words.height)):
+        if bottom is None or top - bottom >= min_gap:
+            bands.append([])
+            bottom = top + height
+        bands[-1].append(row)
+        bottom = max(bottom, top + height)
+    return bands
 
-    return word_data
+def detect_columns(words: WordTable, num_columns: Optional[int] = None) -> Dict:
+    """Split a page's words into header, columns and footer.
 
-def detect_columns(word_data: List[Dict], num_columns: int = 3) -> Dict:
-    """Detect columns in word data using x-coordinate gaps."""
+    The main area between header and footer is cut into horizontal bands at
+    blank rows, and column_gutters is run on each band. The band with the
+    most gutters is the column block (e.g. the ingredient table); main
+    words above it go to the header, words below it (e.g. full-width
+    steps) to the footer. Gutters that would leave a column of fewer than
+    COLUMN_MIN_WORDS words are ignored. The number of columns is inferred
+    from the gutters unless num_columns is given, in which case the widest
+    num_columns - 1 gutters are used (or an even split if there are fewer).
+    Without gutters anywhere, the main area is a single column.
+    """
     # Filter out non-word elements and empty text
-    words = [w for w in word_data if w['text'].strip()]
+    words = words.select(i for i, text in enumerate(words.text) if text.strip())
 
     if not words:
-        return {'header': [], 'columns': [[] for _ in range(num_columns)], 'footer': []}
+        return {'header': WordTable(), 'columns': [WordTable() for _ in range(num_columns or 0)],
+                'footer': WordTable()}
 
     # Sort words by top position (vertical) then left position (horizontal)
-    words.sort(key=lambda w: (w['top'], w['left']))
+    words = words.sorted_by_position()
 
     # Separate header, main content, and footer based on vertical position
-    min_y = min(w['top'] for w in words)
-    max_y = max(w['top'] + w['height'] for w in words)
+    min_y = min(words.top)
+    max_y = max(top + height for top, height in zip(words.top, words.height))
     page_height = max_y - min_y
 
     # Estimate header and footer thresholds
     header_threshold = min_y + page_height * 0.15
     footer_threshold = max_y - page_height * 0.15
 
-    header_words = [w for w in words if w['top'] < header_threshold]
-    footer_words = [w for w in words if w['top'] > footer_threshold]
-    main_words = [w for w in words if header_threshold <= w['top'] <= footer_threshold]
-
-    # Find column boundaries by analyzing x-coordinate gaps
-    x_coords = [w['left'] for w in main_words]
-    min_x = min(x_coords)
-    max_x = max(x_coords)
-
-    # Create histogram of x-coordinates
-    x_histogram = {}
-    for x in x_coords:
-        x_histogram[x] = x_histogram.get(x, 0) + 1
-
-    # Find gaps between columns
-    gaps = []
-    sorted_x = sorted(x_histogram.keys())
-    prev_x = None
-    prev_count = 0
-
-    for x in sorted_x:
-        if prev_x is not None and (x - prev_x) > 20 and prev_count > 5:
-            gaps.append((prev_x, x))
-
-        prev_x = x
-        prev_count = x_histogram[x]
-
-    # Determine column boundaries
-    if not gaps:
-        # Fallback: use even distribution
-        column_width = (max_x - min_x) // num_columns
+    header_rows = [i for i, top in enumerate(words.top) if top < header_threshold]
+    footer_rows = [i for i, top in enumerate(words.top) if top > footer_threshold]
+    main_rows = [i for i, top in enumerate(words.top) if header_threshold <= top <= footer_threshold]
+    main_words = words.select(main_rows)
+
+    # Gap sizes scale with the text size
+    heights = sorted(main_words.height) or [0]
+    text_height = heights[len(heights) // 2]
+    min_gap = max(COLUMN_GAP_MIN_PIXELS, text_height * COLUMN_GAP_MIN_HEIGHTS)
+
+    gutters = []
+    block = main_rows
+    for band in text_bands(main_words, text_height * COLUMN_BAND_GAP_HEIGHTS):
+        # Table rules OCR'd as "|" and other specks sit in the gutters
+        band_words = main_words.select(row for row in band if any(c.isalnum() for c in main_words.text[row]))
+        band_gutters = column_gutters(band_words, min_gap, int(len(band) * COLUMN_GAP_MAX_OVERLAP))
+        band_gutters = merge_thin_columns(band_words, band_gutters)
+        if len(band_gutters) > len(gutters):
+            gutters = band_gutters
+            block = [main_rows[row] for row in band]
+    if gutters:
+        header_rows += [row for row in main_rows if row < block[0]]
+        footer_rows = [row for row in main_rows if row > block[-1]] + footer_rows
+    column_words = words.select(block)
+
+    if num_columns is None:
+        num_columns = len(gutters) + 1
+    elif len(gutters) > num_columns - 1:
+        widest = sorted(gutters, key=lambda gutter: gutter[1] - gutter[0], reverse=True)
+        gutters = sorted(widest[:num_columns - 1])
+
+    if len(gutters) == num_columns - 1:
+        boundaries = [(start + end) / 2 for start, end in gutters]
+    elif column_words:
+        # Not enough gutters, use even distribution as fallback
+        min_x = min(column_words.left)
+        max_x = max(left + width for left, width in zip(column_words.left, column_words.width))
+        column_width = (max_x - min_x) / num_columns
         boundaries = [min_x + i * column_width for i in range(1, num_columns)]
-    else:
-        # Use detected gaps, sorted by position
-        # We need num_columns-1 boundaries to create num_columns columns
-        all_boundaries = [gap[1] for gap in sorted(gaps)]
-        if len(all_boundaries) >= num_columns - 1:
-            boundaries = all_boundaries[:num_columns-1]
-        else:
-            # Not enough gaps, use even distribution as fallback
-            column_width = (max_x - min_x) // num_columns
-            boundaries = [min_x + i * column_width for i in range(1, num_columns)]
-
-    # Assign main words to columns
-    columns = [[] for _ in range(num_columns)]
-    for word in main_words:
-        column_idx = 0
-        for i, boundary in enumerate(boundaries):
-            if word['left'] < boundary:
-                break
-            column_idx = i + 1
-        columns[column_idx].append(word)
+
+    # Assign words to columns by their horizontal center
+    column_rows = [[] for _ in range(num_columns)]
+    for row, (left, width) in enumerate(zip(column_words.left, column_words.width)):
+        column_rows[bisect_right(boundaries, left + width / 2)].append(row)
 
     return {
-        'header': header_words,
-        'columns': columns,
-        'footer': footer_words
+        'header': words.select(sorted(header_rows)),
+        'columns': [column_words.select(rows) for rows in column_rows],
+        'footer': words.select(footer_rows)
     }
 
 def format_markdown(result: Dict) -> str:
@@ -190,32 +811,7 @@ def format_markdown(result: Dict) -> str:
 
     # Format header
     if result['header']:
-        header_words = result['header']
-        header_words.sort(key=lambda w: (w['top'], w['left']))
-
-        # Group header words by line
-        header_lines = []
-        current_line = []
-        current_top = None
-        line_tolerance = 10
-
-        for word in header_words:
-            if current_top is None or abs(word['top'] - current_top) <= line_tolerance:
-                current_line.append(word)
-                current_top = word['top']
-            else:
-                # Process current line
-                line_text = ' '.join(word['text'] for word in current_line)
-                header_lines.append(line_text)
-                current_line = [word]
-                current_top = word['top']
-
-        # Add last line
-        if current_line:
-            line_text = ' '.join(word['text'] for word in current_line)
-            header_lines.append(line_text)
-
-        markdown.extend(header_lines)
+        markdown.extend(line_texts(result['header']))
         markdown.append('')  # Add blank line after header
 
     # Format columns
@@ -226,30 +822,7 @@ def format_markdown(result: Dict) -> str:
         # Add column header
         markdown.append(f"# Column {i+1}:")
         markdown.append('')
-
-        # Sort words by top position, then left position
-        column.sort(key=lambda w: (w['top'], w['left']))
-
-        # Group words by line (vertical proximity)
-        current_line = []
-        current_top = None
-        line_tolerance = 10
-
-        for word in column:
-            if current_top is None or abs(word['top'] - current_top) <= line_tolerance:
-                current_line.append(word)
-                current_top = word['top']
-            else:
-                # Process current line
-                line_text = ' '.join(word['text'] for word in current_line)
-                markdown.append(line_text)
-                current_line = [word]
-                current_top = word['top']
-
-        # Add last line
-        if current_line:
-            line_text = ' '.join(word['text'] for word in current_line)
-            markdown.append(line_text)
+        markdown.extend(line_texts(column))
 
         # Add blank line between columns
         markdown.append('')
@@ -258,86 +831,375 @@ def format_markdown(result: Dict) -> str:
     if result['footer']:
         if markdown and markdown[-1] != '':
             markdown.append('')  # Add blank line before footer
-
-        footer_words = result['footer']
-        footer_words.sort(key=lambda w: (w['top'], w['left']))
-
-        # Group footer words by line
-        footer_lines = []
-        current_line = []
-        current_top = None
-        line_tolerance = 10
-
-        for word in footer_words:
-            if current_top is None or abs(word['top'] - current_top) <= line_tolerance:
-                current_line.append(word)
-                current_top = word['top']
-            else:
-                # Process current line
-                line_text = ' '.join(word['text'] for word in current_line)
-                footer_lines.append(line_text)
-                current_line = [word]
-                current_top = word['top']
-
-        # Add last line
-        if current_line:
-            line_text = ' '.join(word['text'] for word in current_line)
-            footer_lines.append(line_text)
-
-        markdown.extend(footer_lines)
+        markdown.extend(line_texts(result['footer']))
 
     return '\n'.join(markdown)
 
-def process_pdf_to_markdown(pdf_path: str, temp_dir: str = "/tmp") -> str:
-    """Process a PDF file and convert it to markdown with column detection."""
-    # Convert PDF to PNG images
-    png_files = pdf_to_png(pdf_path, temp_dir)
+def words_bbox(words: WordTable) -> Tuple[int, int, int, int]:
+    """(x0, y0, x1, y1) bounding box of all word boxes in a non-empty table."""
+    return (min(words.left), min(words.top),
+            max(left + width for left, width in zip(words.left, words.width)),
+            max(top + height for top, height in zip(words.top, words.height)))
 
-    if not png_files:
-        return "# Error: Failed to convert PDF to images"
+def region_chunks(words: WordTable, max_words: int) -> List[Tuple[int, int, int, int]]:
+    """Cut a region's words (sorted by top) at blank rows into boxes of about max_words words each."""
+    chunks: List[List[int]] = [[]]
+    for band in text_bands(words, 1):
+        if chunks[-1] and len(chunks[-1]) + len(band) > max_words:
+            chunks.append([])
+        chunks[-1].extend(band)
+    return [words_bbox(words.select(rows)) for rows in chunks if rows]
 
-    all_markdown = []
+def page_regions(layout: Dict, max_words: int) -> List[Tuple[str, int, Tuple[int, int, int, int]]]:
+    """List the regions of a detect_columns result to OCR as (kind, column index, bbox).
 
-    # Process each PNG file
-    for i, png_file in enumerate(png_files):
-        print(f"DEBUG: Processing PNG file: {png_file}")
-        print(f"DEBUG: File exists: {os.path.exists(png_file)}")
-        # Run Tesseract OCR
-        tsv_data = run_tesseract_tsv(png_file)
-        if not tsv_data:
-            print(f"DEBUG: No TSV data returned for {png_file}")
-            continue
+    Columns are one region each; the header and footer (e.g. a long list of
+    steps) are cut into chunks of at most about max_words words, so no
+    region takes much longer than the others.
+    """
+    regions = [("header", 0, box) for box in region_chunks(layout['header'], max_words)]
+    regions += [("column", i, words_bbox(column)) for i, column in enumerate(layout['columns']) if column]
+    regions += [("footer", 0, box) for box in region_chunks(layout['footer'], max_words)]
+    return regions
+
+def box_distance(box: Tuple[int, int, int, int], x: float, y: float) -> float:
+    """Distance from a point to a box (0 inside it)."""
+    x0, y0, x1, y1 = box
+    return max(x0 - x, 0, x - x1) + max(y0 - y, 0, y - y1)
+
+def ocr_regions(image: PageImage, omp_thread_limit: Optional[int] = None, options: OcrOptions = OcrOptions(),
+                tsv_cache: Optional[ResultCache] = None, timings: Optional[Dict[str, float]] = None,
+                max_workers: int = MAX_OCR_WORKERS) -> Optional[Dict]:
+    """OCR a page region by region: layout analysis, then up to max_workers region crops at a time.
+
+    Returns a detect_columns-style result with word boxes in pixels of the
+    page at options.scale, or None if the page should be OCR'd whole
+    instead: tesserocr or PyMuPDF is missing, the page has a single region
+    or OCR failed.
+    """
+    page = load_raster(image) if tesseract_api.available() else None
+    if page is None:
+        logger.warning("Region OCR needs tesserocr and PyMuPDF, OCR'ing the whole page")
+        return None
+
+    # Phase 1: where are the header, columns and footer?
+    with span("layout", timings):
+        boxes = tesseract_api.layout_boxes(page, psm=options.psm, oem=options.oem, lang=options.lang)
+        if not boxes:
+            return None
+        words = WordTable()
+        for x0, y0, x1, y1 in boxes:
+            words.append(x0, y0, x1 - x0, y1 - y0, LAYOUT_WORD)
+        # detect_columns' thresholds assume the options.scale page size
+        words.scale(options.scale / max(page.width, page.height))
+        layout = detect_columns(words, num_columns=options.num_columns)
+    regions = page_regions(layout, max(1, -(-len(words) // max_workers)))
+    if len(regions) < 2:
+        return None
+
+    # Phase 2: OCR the padded crops at full resolution, sharing the cores
+    zoom = max(page.width, page.height) / options.scale
+    heights = sorted(words.height)
+    margin = heights[len(heights) // 2] * REGION_MARGIN_HEIGHTS
+    boxes = [tuple(round(v * zoom) for v in box) for _, _, box in regions]
+    crops = [(max(0, x0 - round(margin * zoom)), max(0, y0 - round(margin * zoom)),
+              min(page.width, x1 + round(margin * zoom)), min(page.height, y1 + round(margin * zoom)))
+             for x0, y0, x1, y1 in boxes]
+    workers = min(len(regions), max_workers)
+    region_thread_limit = max(1, (omp_thread_limit or os.cpu_count() or 1) // workers)
+
+    def ocr_region(index: int) -> Optional[WordTable]:
+        kind, crop = regions[index][0], crops[index]
+        region_output = run_tesseract(crop_raster(page, crop), omp_thread_limit=region_thread_limit,
+                                      psm=REGION_PSM[kind], oem=options.oem, lang=options.lang,
+                                      cache=tsv_cache, engine=options.engine, output_format=options.ocr_format)
+        if region_output is None:
+            return None
+        region_words = parse_ocr_output(region_output, options.ocr_format)
+        region_words.offset(crop[0], crop[1])
+
+        # Crops overlap by their margins, and the layout pass may have missed
+        # words at a region's edge: a word is kept by the region nearest to
+        # its center among those whose crop contains it
+        def owner(x: float, y: float) -> int:
+            return min((box_distance(boxes[other], x, y), other) for other, (x0, y0, x1, y1) in enumerate(crops)
+                       if x0 <= x <= x1 and y0 <= y <= y1)[1]
+        region_words = region_words.select(
+            i for i, (left, top, width, height) in enumerate(zip(region_words.left, region_words.top,
+                                                                 region_words.width, region_words.height))
+            if owner(left + width / 2, top + height / 2) == index)
+        region_words.scale(1 / zoom)
+        return region_words
+
+    with span("ocr", timings), ThreadPoolExecutor(max_workers=workers) as executor:
+        region_words = list(executor.map(ocr_region, range(len(regions))))
+    if any(words is None for words in region_words):
+        return None
+
+    result = {'header': WordTable(), 'columns': [WordTable() for _ in layout['columns']], 'footer': WordTable()}
+    for (kind, i, _), words in zip(regions, region_words):
+        if kind == "column":
+            result['columns'][i] = words
+        else:
+            result[kind].extend(words)
+    return result
 
-        # Debug: Show first few lines of TSV data
+def ocr_ensemble(image: PageImage, omp_thread_limit: Optional[int] = None, options: OcrOptions = OcrOptions(),
+                 tsv_cache: Optional[ResultCache] = None, max_workers: int = MAX_OCR_WORKERS,
+                 deadline: Optional[float] = None) -> List[Optional[str]]:
+    """OCR a page with options.psm and each of options.ensemble_psms, up to max_workers runs at a time.
+
+    Returns the output of every run, the options.psm run first. The other
+    runs only get the time left until deadline (a time.monotonic() value,
+    default ENSEMBLE_BUDGET seconds from now); runs that failed, didn't
+    finish or didn't start in time are None. The primary run OCRs image
+    as is, so it shares cache entries with a page OCR'd without the
+    ensemble; the image file is decoded once (with PyMuPDF) for the others.
+    """
+    if deadline is None:
+        deadline = time.monotonic() + ENSEMBLE_BUDGET
+    raster = load_raster(image) if fitz is not None else None
+    shared = raster if raster is not None else image
+    psms = [options.psm] + [psm for psm in options.ensemble_psms if psm != options.psm]
+    workers = max(1, min(len(psms), max_workers))
+    run_thread_limit = max(1, (omp_thread_limit or os.cpu_count() or 1) // workers)
+
+    def ocr(psm: int) -> Optional[str]:
+        # The primary run always completes, so the page gets a result
+        timeout = None
+        if psm != options.psm:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                logger.warning("Ensemble budget used up, skipping --psm %d", psm)
+                return None
+        return run_tesseract(image if psm == options.psm else shared, omp_thread_limit=run_thread_limit, psm=psm, oem=options.oem, lang=options.lang,
+                             cache=tsv_cache, engine=options.engine, timeout=timeout, output_format=options.ocr_format)
+
+    # With a single worker the primary run goes first, the others get what it left
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(ocr, psms))
+
+def process_page(image: PageImage, page_num: int, omp_thread_limit: Optional[int] = None,
+                 options: OcrOptions = OcrOptions(), tsv_cache: Optional[ResultCache] = None,
+                 max_workers: int = MAX_OCR_WORKERS) -> Optional[str]:
+    """OCR a single page image and return its markdown, or None if OCR failed.
+
+    max_workers is the number of Tesseract runs the page may have going at
+    once. With options.region_ocr and at least two of them, the page's
+    regions are OCR'd concurrently (see ocr_regions); pages with a single
+    region are OCR'd whole. With options.ensemble_psms, the ensemble runs
+    share them (see ocr_ensemble).
+    """
+    started = time.monotonic()
+    timings: Dict[str, float] = {}
+    if isinstance(image, RawImage):
+        logger.debug("Processing in-memory page %d: %dx%d", page_num, image.width, image.height)
+    else:
+        logger.debug("Processing page %d: %s", page_num, image)
+
+    if options.region_ocr and max_workers > 1:
+        result = ocr_regions(image, omp_thread_limit, options, tsv_cache, timings, max_workers)
+        if result is not None:
+            markdown = layout_to_page_markdown(result, page_num, timings)
+            logger.debug("Page %d: region OCR, %s", page_num,
+                         ", ".join(f"{stage} {seconds * 1000:.0f} ms" for stage, seconds in timings.items()))
+            return markdown
+
+    # Run Tesseract OCR
+    with span("ocr", timings):
+        if options.ensemble_psms:
+            ocr_output, *ensemble_output = ocr_ensemble(image, omp_thread_limit, options, tsv_cache, max_workers,
+                                                        deadline=started + ENSEMBLE_BUDGET)
+        else:
+            ocr_output = run_tesseract(image, omp_thread_limit=omp_thread_limit,
+                                       psm=options.psm, oem=options.oem, lang=options.lang,
+                                       cache=tsv_cache, engine=options.engine, output_format=options.ocr_format)
+            ensemble_output = []
+    if not ocr_output:
+        logger.warning("No OCR output returned for page %d", page_num)
+        return None
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("First %s lines of page %d:\n%s", options.ocr_format, page_num,
+                     '\n'.join(ocr_output.split('\n', 10)[:10]))
 
-        print(f"DEBUG: First 200 chars of TSV data: {tsv_data[:200]}")
-        # Show first 10 lines to see if there are any level 5 entries
-        lines = tsv_data.strip().split('\n')
-        print(f"DEBUG: First 10 lines of TSV data:")
-        for i, line in enumerate(lines[:10]):
-            print(f"  {i}: {line}")
+    # Parse the OCR output
+    with span("parse", timings):
+        words = parse_ocr_output(ocr_output, options.ocr_format)
+        if ensemble_output:
+            words = merge_words(words, [parse_ocr_output(other, options.ocr_format)
+                                        for other in ensemble_output if other])
 
+        # Images not rendered at options.scale (native-resolution scans, adaptive
+        # renders) are brought to that scale, which the layout thresholds assume
+        page_size = ocr_page_size(ocr_output, options.ocr_format)
+        if page_size and max(page_size) != options.scale:
+            words.scale(options.scale / max(page_size))
 
-        # Parse TSV data
-        word_data = parse_tsv_output(tsv_data)
-        print(f"DEBUG: Parsed {len(word_data)} words from TSV data")
+    markdown = words_to_page_markdown(words, page_num, options, timings)
+    logger.debug("Page %d: %d words, %s", page_num, len(words),
+                 ", ".join(f"{stage} {seconds * 1000:.0f} ms" for stage, seconds in timings.items()))
+    return markdown
 
-        # Detect columns
-        result = detect_columns(word_data, num_columns=3)
+def words_to_page_markdown(words: WordTable, page_num: int, options: OcrOptions = OcrOptions(),
+                           timings: Optional[Dict[str, float]] = None) -> str:
+    """Lay out a page's words and return its markdown with a page header."""
+    # Detect columns
+    with span("layout", timings):
+        result = detect_columns(words, num_columns=options.num_columns)
+    return layout_to_page_markdown(result, page_num, timings)
 
-        # Format as markdown
+def layout_to_page_markdown(result: Dict, page_num: int, timings: Optional[Dict[str, float]] = None) -> str:
+    """Format a detect_columns result as markdown with a page header."""
+    # Format as markdown
+    with span("format", timings):
         markdown = format_markdown(result)
-        print(f"DEBUG: Generated markdown length: {len(markdown)}")
 
-        # Add page header
-        page_markdown = f"# Page {i+1}\n\n{markdown}"
-        all_markdown.append(page_markdown)
+    # Add page header
+    return f"# Page {page_num}\n\n{markdown}"
+
+# Called as progress(pages_done, page_count); page_count is None when unknown
+ProgressCallback = Callable[[int, Optional[int]], None]
+# Called as on_page(page_num, page_markdown) when a page has been converted
+PageCallback = Callable[[int, str], None]
+
+# Part of the document cache key. Bump it when a change to OCR, layout or
+# markdown formatting should invalidate results cached by earlier versions.
+PIPELINE_VERSION = 2
+
+def result_cache_key(pdf_path: str, options: OcrOptions) -> str:
+    """Cache key for a document: SHA-256 of the PDF plus the pipeline version and options."""
+    return make_key(file_sha256(pdf_path), {**asdict(options), "pipeline_version": PIPELINE_VERSION})
+
+def join_pages(pages: Dict[int, Optional[str]]) -> str:
+    """Assemble per-page markdown in page order, skipping pages that failed."""
+    return "\n---\n".join(pages[page_num] for page_num in sorted(pages) if pages[page_num] is not None)
 
-    # Clean up temporary files
-    for png_file in png_files:
+def replay_pages(pages: List[str], progress: Optional[ProgressCallback] = None,
+                 on_page: Optional[PageCallback] = None) -> str:
+    """Report a cached document's pages to the callbacks as if just converted, and return its markdown."""
+    if progress:
+        progress(0, len(pages))
+    for page_num, page_markdown in enumerate(pages, 1):
+        if progress:
+            progress(page_num, len(pages))
+        if on_page:
+            on_page(page_num, page_markdown)
+    return join_pages(dict(enumerate(pages, 1)))
+
+def process_pdf_to_markdown(pdf_path: str, temp_dir: Optional[str] = None, max_workers: Optional[int] = None,
+                            progress: Optional[ProgressCallback] = None, options: OcrOptions = OcrOptions(),
+                            cache: Optional[ResultCache] = None, tsv_cache: Optional[ResultCache] = None,
+                            on_page: Optional[PageCallback] = None) -> str:
+    """Process a PDF file and convert it to markdown with column detection.
+
+    See iter_pdf_markdown for how pages are processed; the output keeps the
+    original page order. If given, on_page receives each page's markdown as
+    soon as it is ready (in completion order), e.g. for streaming responses.
+
+    With a cache, results are looked up by the SHA-256 of the PDF plus the
+    pipeline options, so a repeated upload skips rendering and OCR; its
+    pages are still reported to progress and on_page. Only documents where
+    every page produced markdown are cached, so a one-off rendering or
+    Tesseract failure isn't served again. The
+    tsv_cache keeps raw Tesseract output per page image (see run_tesseract_tsv),
+    so a changed num_columns still avoids re-running OCR.
+    """
+    cache_key = None
+    if cache is not None:
+        cache_key = result_cache_key(pdf_path, options)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return replay_pages(json.loads(cached), progress, on_page)
+
+    pages = {}
+    for page_num, page_markdown in iter_pdf_markdown(pdf_path, temp_dir, max_workers, progress, options, tsv_cache):
+        pages[page_num] = page_markdown
+        if on_page and page_markdown is not None:
+            on_page(page_num, page_markdown)
+    if not pages:
+        return "# Error: Failed to convert PDF to images"
+
+    markdown = join_pages(pages)
+    if cache_key is not None:
+        page_count = pdf_page_count(pdf_path)
+        if page_count is not None and all(pages.get(page_num) is not None for page_num in range(1, page_count + 1)):
+            cache.put(cache_key, json.dumps([pages[page_num] for page_num in range(1, page_count + 1)]))
+        else:
+            logger.warning("Not caching %s: %d of %s pages converted", pdf_path,
+                           sum(1 for page in pages.values() if page is not None), page_count)
+    return markdown
+
+def iter_pdf_markdown(pdf_path: str, temp_dir: Optional[str] = None, max_workers: Optional[int] = None,
+                      progress: Optional[ProgressCallback] = None, options: OcrOptions = OcrOptions(),
+                      tsv_cache: Optional[ResultCache] = None) -> Iterator[Tuple[int, Optional[str]]]:
+    """Yield (page_num, page_markdown) for each page as soon as its OCR finishes.
+
+    Pages are rasterized one at a time and handed to a pool of up to
+    max_workers Tesseract processes (default MAX_OCR_WORKERS) as soon as they
+    are rendered. Documents with fewer pages than workers share the spare
+    ones between their pages (see process_page). Rendering stays at most PAGES_IN_FLIGHT_PER_WORKER pages
+    per worker ahead of OCR, so memory and scratch use don't grow with the
+    page count. Results arrive in completion order; page_markdown is None
+    for pages where OCR failed.
+
+    Page images are written to a private scratch directory created under
+    temp_dir (default SCRATCH_ROOT), which is removed when processing ends,
+    so concurrent calls never share files.
+
+    If given, progress is called from the worker threads as pages finish.
+    """
+    with tempfile.TemporaryDirectory(prefix="pdfocr-", dir=temp_dir or SCRATCH_ROOT) as scratch_dir:
+        yield from _iter_pages(pdf_path, scratch_dir, max_workers, progress, options, tsv_cache)
+
+def _iter_pages(pdf_path: str, scratch_dir: str, max_workers: Optional[int],
+                progress: Optional[ProgressCallback], options: OcrOptions,
+                tsv_cache: Optional[ResultCache]) -> Iterator[Tuple[int, Optional[str]]]:
+    """Run the rasterize/OCR pipeline with page images kept in scratch_dir."""
+    page_count = pdf_page_count(pdf_path)
+    pages_done = 0
+    progress_lock = threading.Lock()
+    if progress:
+        progress(0, page_count)
+    max_runs = max(1, max_workers or MAX_OCR_WORKERS)
+    workers = min(max_runs, page_count) if page_count else max_runs
+    # Pages of short documents may use the workers left over, e.g. for
+    # region OCR, so there are never more than max_runs Tesseract runs
+    page_runs = max_runs // workers
+    # Share the document's part of the cores (max_runs of MAX_OCR_WORKERS;
+    # the server runs several documents at once) between workers instead of
+    # letting every Tesseract process start one OpenMP thread per core.
+    omp_thread_limit = max(1, (os.cpu_count() or 1) * max_runs // max(MAX_OCR_WORKERS, max_runs) // workers)
+
+    def ocr_page(source: PageSource, page_num: int) -> Optional[str]:
+        nonlocal pages_done
         try:
-            os.remove(png_file)
-        except:
-            pass
+            if isinstance(source, WordTable):
+                # Page has a usable text layer, no OCR needed
+                return words_to_page_markdown(source, page_num, options)
+            return process_page(source, page_num, omp_thread_limit, options, tsv_cache, page_runs)
+        finally:
+            # Clean up the page image as soon as it has been OCR'd
+            if isinstance(source, str):
+                try:
+                    os.remove(source)
+                except OSError:
+                    pass
+            if progress:
+                with progress_lock:
+                    pages_done += 1
+                    progress(pages_done, page_count)
+
+    max_in_flight = workers * PAGES_IN_FLIGHT_PER_WORKER
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        for page_num, source in iter_pdf_pages(pdf_path, scratch_dir, page_count, options):
+            pending[executor.submit(ocr_page, source, page_num)] = page_num
+            # Hand out pages that finished while we were rendering; with a
+            # full window, wait for one before rendering the next page
+            window_full = len(pending) >= max_in_flight
+            done, _ = wait(pending, timeout=None if window_full else 0, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
 
-    return "\n---\n".join(all_markdown)
+        for future in as_completed(pending):
+            yield pending[future], future.result()
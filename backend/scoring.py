@@ -0,0 +1,154 @@
+"""
+Fuzzy accuracy scoring of OCR output against ground truth.
+Exact word matching counts near-misses ("charnpignons" for "champignons")
+as failures. Here, candidate matches are looked up in a character n-gram
+index and confirmed with an edit distance that gives up as soon as it
+exceeds the allowed number of errors, so whole sweep grids score quickly.
+"""
+
+import heapq
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+# A word is found if the OCR has a word within this fraction of its length
+# in edits (rounded down: "zout" allows 1, "gr" must match exactly)
+FUZZY_MAX_ERROR_RATE = 0.25
+# Index lookups verify at most this many of the best n-gram candidates
+MAX_CANDIDATES = 8
+
+def ngrams(text: str, n: int = 3) -> Set[str]:
+    """Character n-grams of text padded with a space on either side, so short words get grams too."""
+    padded = f" {text} "
+    return {padded[i:i + n] for i in range(max(1, len(padded) - n + 1))}
+
+class NgramIndex:
+    """Inverted index from character n-grams to the strings that contain them."""
+
+    def __init__(self, items: Iterable[str], n: int = 3):
+        self.items = list(items)
+        self.n = n
+        self.postings: Dict[str, List[int]] = {}
+        for i, item in enumerate(self.items):
+            for gram in ngrams(item, n):
+                self.postings.setdefault(gram, []).append(i)
+
+    def candidates(self, query: str, limit: int = MAX_CANDIDATES) -> List[int]:
+        """Indices of the items sharing the most n-grams with query, best first (ties in item order)."""
+        counts = Counter()
+        for gram in ngrams(query, self.n):
+            counts.update(self.postings.get(gram, ()))
+        return [i for i, _ in heapq.nsmallest(limit, counts.items(), key=lambda item: (-item[1], item[0]))]
+
+def edit_distance(a: Sequence, b: Sequence, max_distance: Optional[int] = None) -> int:
+    """Levenshtein distance between two strings (or token lists).
+
+    With max_distance, only a diagonal band of that width is computed and
+    max_distance + 1 is returned as soon as the distance must exceed it.
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    if max_distance is None:
+        max_distance = len(b)
+    if len(b) - len(a) > max_distance:
+        return max_distance + 1
+
+    too_far = max_distance + 1
+    previous = [j if j <= max_distance else too_far for j in range(len(a) + 1)]
+    for i in range(1, len(b) + 1):
+        low, high = max(1, i - max_distance), min(len(a), i + max_distance)
+        current = [too_far] * (len(a) + 1)
+        current[0] = i if i <= max_distance else too_far
+        item = b[i - 1]
+        for j in range(low, high + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[j - 1] != item))
+        if min(current[low - 1:high + 1]) > max_distance:
+            return too_far
+        previous = current
+    return min(previous[len(a)], too_far)
+
+def substring_distance(pattern: Sequence, text: Sequence, max_distance: Optional[int] = None) -> int:
+    """Edit distance between pattern and its best-matching stretch of text.
+
+    Skipping text before and after the match is free, so a ground-truth line
+    is matched inside an OCR line that also holds the neighbouring columns.
+    With max_distance, max_distance + 1 is returned once it can't be met.
+    """
+    if max_distance is None:
+        max_distance = len(pattern)
+    too_far = max_distance + 1
+    previous = [0] * (len(text) + 1)
+    for i in range(1, len(pattern) + 1):
+        current = [i] + [0] * len(text)
+        item = pattern[i - 1]
+        for j in range(1, len(text) + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (text[j - 1] != item))
+        if min(current) > max_distance:
+            return too_far
+        previous = current
+    return min(min(previous), too_far)
+
+def normalize(text: str) -> str:
+    """Lowercase and collapse whitespace, as all scores compare text."""
+    return ' '.join(text.lower().split())
+
+def score_words(expected: Iterable[str], found: Iterable[str],
+                max_error_rate: float = FUZZY_MAX_ERROR_RATE) -> Dict[str, int]:
+    """Count the expected words the OCR found exactly, and within max_error_rate edits.
+
+    Returns counts of expected words, exact hits, fuzzy hits (including the
+    exact ones) and the total edits of the fuzzy matches.
+    """
+    expected = {normalize(word) for word in expected} - {''}
+    vocabulary = {normalize(word) for word in found} - {''}
+    index = NgramIndex(sorted(vocabulary))
+    exact = fuzzy = edits = 0
+    for word in expected:
+        if word in vocabulary:
+            exact += 1
+            fuzzy += 1
+            continue
+        bound = int(len(word) * max_error_rate)
+        if bound == 0:
+            continue
+        best = bound + 1
+        for i in index.candidates(word):
+            best = min(best, edit_distance(word, index.items[i], best - 1))
+        if best <= bound:
+            fuzzy += 1
+            edits += best
+    return {'expected': len(expected), 'exact': exact, 'fuzzy': fuzzy, 'edits': edits}
+
+def align_lines(reference: Iterable[str], hypothesis: Iterable[str]) -> Dict[str, int]:
+    """Align ground-truth lines with OCR lines and count character and word errors.
+
+    Each reference line is matched to the OCR line (found through the
+    n-gram index) that contains it with the fewest character edits; its
+    word errors are counted against the same line. Lines with no match
+    count as entirely missed. CER and WER are char_errors / ref_chars and
+    word_errors / ref_words (see error_rate).
+    """
+    lines = [normalize(line) for line in hypothesis]
+    index = NgramIndex(lines)
+    totals = {'ref_chars': 0, 'char_errors': 0, 'ref_words': 0, 'word_errors': 0}
+    for line in reference:
+        line = normalize(line)
+        if not line:
+            continue
+        tokens = line.split()
+        best_chars, best_line = len(line), None
+        for i in index.candidates(line):
+            distance = substring_distance(line, lines[i], best_chars - 1)
+            if distance < best_chars:
+                best_chars, best_line = distance, i
+        best_words = len(tokens)
+        if best_line is not None:
+            best_words = min(best_words, substring_distance(tokens, lines[best_line].split(), best_words))
+        totals['ref_chars'] += len(line)
+        totals['char_errors'] += best_chars
+        totals['ref_words'] += len(tokens)
+        totals['word_errors'] += best_words
+    return totals
+
+def error_rate(errors: int, total: int) -> Optional[float]:
+    """errors / total, or None without reference text."""
+    return errors / total if total else None
@@ -0,0 +1,120 @@
+"""
+In-process Tesseract engine using tesserocr (libtesseract bindings).
+Initialized API handles are pooled and reused across pages and requests, so
+the traineddata is loaded once per handle instead of once per page.
+tesserocr is optional; the CLI engine in pdf_processor works without it.
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+logger = logging.getLogger(__name__)
+
+def available() -> bool:
+    """Return True if the tesserocr bindings can be used."""
+    return tesserocr is not None
+
+class ApiPool:
+    """Pool of initialized PyTessBaseAPI handles keyed by (lang, oem).
+
+    A handle is used by one thread at a time; the pool grows to the number of
+    concurrent OCR workers and then stays at that size.
+    """
+
+    def __init__(self):
+        self._idle: Dict[Tuple[str, int], List] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self, lang: str, oem: int) -> Iterator:
+        key = (lang, oem)
+        with self._lock:
+            idle = self._idle.get(key)
+            api = idle.pop() if idle else None
+        if api is None:
+            api = tesserocr.PyTessBaseAPI(lang=lang, oem=oem)
+
+        try:
+            yield api
+        except BaseException:
+            # Don't hand out a handle that failed mid-recognition
+            api.End()
+            raise
+        api.Clear()
+        with self._lock:
+            self._idle.setdefault(key, []).append(api)
+
+    def close(self) -> None:
+        """Release all idle handles."""
+        with self._lock:
+            handles = [api for idle in self._idle.values() for api in idle]
+            self._idle.clear()
+        for api in handles:
+            api.End()
+
+API_POOL = ApiPool()
+
+# Block types that hold text (libtesseract's PTIsTextType); rules, pictures
+# and noise are the others
+TEXT_BLOCK_TYPES = frozenset(getattr(tesserocr.PT, name) for name in (
+    "FLOWING_TEXT", "HEADING_TEXT", "PULLOUT_TEXT", "EQUATION", "INLINE_EQUATION",
+    "VERTICAL_TEXT", "TABLE", "CAPTION_TEXT")) if tesserocr else frozenset()
+
+def set_image(api, image) -> None:
+    """Hand an image file or pdf_processor.RawImage to an API handle."""
+    if isinstance(image, str):
+        api.SetImageFile(image)
+    else:
+        api.SetImageBytes(image.samples, image.width, image.height,
+                          image.channels, image.width * image.channels)
+
+def image_to_text(image, psm: int = 3, oem: int = 1, lang: str = "nld",
+                  timeout: Optional[float] = None, output_format: str = "tsv") -> Optional[str]:
+    """OCR an image file or pdf_processor.RawImage with a pooled API handle and return TSV or hOCR output.
+
+    output_format is "tsv" or "hocr". RawImage samples are handed to
+    Tesseract directly, without any encoding. With a timeout (seconds),
+    recognition is cancelled when it runs longer and None is returned.
+
+    Unlike the tesseract CLI, TSV output has no header line;
+    words.parse_tsv skips the header either way.
+    """
+    try:
+        with API_POOL.acquire(lang, oem) as api:
+            api.SetPageSegMode(psm)
+            set_image(api, image)
+            if timeout is not None and not api.Recognize(timeout=int(timeout * 1000)):
+                logger.warning("tesserocr recognition (psm %d) stopped after %.1f s", psm, timeout)
+                return None
+            return api.GetHOCRText(0) if output_format == "hocr" else api.GetTSVText(0)
+    except RuntimeError as e:
+        logger.error("tesserocr failed: %s", e)
+        return None
+
+def layout_boxes(image, psm: int = 3, oem: int = 1,
+                 lang: str = "nld") -> Optional[List[Tuple[int, int, int, int]]]:
+    """Find the words of an image with layout analysis only, without recognizing them.
+
+    Returns the (x0, y0, x1, y1) boxes of the words in text blocks, or None
+    if the analysis failed. This is a fraction of the cost of image_to_text.
+    """
+    try:
+        with API_POOL.acquire(lang, oem) as api:
+            api.SetPageSegMode(psm)
+            set_image(api, image)
+            iterator = api.AnalyseLayout()
+            if iterator is None:
+                return []
+            return [word.BoundingBox(tesserocr.RIL.WORD)
+                    for word in tesserocr.iterate_level(iterator, tesserocr.RIL.WORD)
+                    if word.BlockType() in TEXT_BLOCK_TYPES]
+    except RuntimeError as e:
+        logger.error("tesserocr layout analysis failed: %s", e)
+        return None
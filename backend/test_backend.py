@@ -5,7 +5,17 @@ Test script for the backend PDF processing.
 """
 
 import os
-from pdf_processor import process_pdf_to_markdown
+import pytest
+from fastapi.testclient import TestClient
+import main
+import pdf_processor
+from cache import ResultCache, make_key
+from jobs import JobStore
+from metrics import Histogram, render_metrics, span
+from pdf_processor import (RawImage, crop_raster, detect_columns, page_regions, parse_tsv_output,
+                           process_pdf_to_markdown, text_layer_words)
+from scoring import align_lines, edit_distance, score_words, substring_distance
+from words import WordTable, hocr_page_size, iter_hocr, line_texts, merge_words, parse_hocr, parse_tsv
 
 def test_pdf_processing():
     """Test the PDF processing with the sample PDF."""
@@ -32,6 +42,411 @@ def test_pdf_processing():
     print(f"Full output saved to {output_file}")
     print(f"Total length: {len(markdown)} characters")
 
+def test_job_store():
+    """Finished jobs are reported and expire after the TTL."""
+    store = JobStore(ttl=0)
+    job = store.create("menu.pdf")
+    job.update_progress(1, 2)
+    assert store.get(job.id).to_dict()["pages_done"] == 1
+    assert store.get(job.id).status == "running"
+
+    job.finish("# Page 1")
+    job.finished_at -= 1
+    assert store.get(job.id) is None
+
+def test_upload_too_large():
+    """Oversized uploads get a 413, from their Content-Length or, for chunked bodies, while they are counted."""
+    client = TestClient(main.app)
+    headers = {"content-type": "multipart/form-data; boundary=x"}
+    body = b"x" * (main.MAX_UPLOAD_BYTES + main.MULTIPART_OVERHEAD_BYTES + 1)
+    response = client.post("/upload", content=body, headers=headers)
+    assert response.status_code == 413
+
+    def chunks():
+        for _ in range(main.MAX_UPLOAD_BYTES // main.UPLOAD_CHUNK_SIZE + 2):
+            yield b"x" * main.UPLOAD_CHUNK_SIZE
+
+    response = client.post("/upload", content=chunks(), headers=headers)
+    assert response.status_code == 413
+    assert "content-length" not in response.request.headers
+
+def test_result_cache(tmp_path):
+    """Entries survive memory eviction on disk, and the disk tier is size-bounded."""
+    cache = ResultCache(str(tmp_path), max_memory_items=1, max_disk_bytes=10)
+    key_a = make_key("a" * 64, {"psm": 3})
+    key_b = make_key("a" * 64, {"psm": 6})
+    assert key_a != key_b
+
+    cache.put(key_a, "12345")
+    cache.put(key_b, "67890")
+    assert cache.get(key_a) == "12345"  # evicted from memory, read back from disk
+
+    cache.put(make_key("b" * 64, {"psm": 3}), "abcde")
+    assert sum(f.stat().st_size for f in tmp_path.iterdir()) <= 10
+
+def test_text_layer_words():
+    """Digital pages yield TSV-style word records in rendered pixels; near-empty pages need OCR."""
+    if pdf_processor.fitz is None:
+        pytest.skip("PyMuPDF is not installed")
+    doc = pdf_processor.fitz.open()
+    page = doc.new_page(width=600, height=800)
+    for i in range(12):
+        page.insert_text((50, 50 + i * 20), f"regel {i + 1}", fontsize=10)
+    doc.new_page(width=600, height=800).insert_text((50, 50), "stempel", fontsize=10)
+
+    words = text_layer_words(doc[0], scale=1200)
+    assert len(words) == 24
+    assert words.text[0] == "regel"
+    assert words.block[-1] == 12  # one block per inserted line
+    assert words.top[-1] > 1200 * (50 + 11 * 20 - 15) / 800  # scaled to the 1200px render
+    assert text_layer_words(doc[1]) is None
+
+@pytest.mark.skipif(pdf_processor.fitz is None, reason="needs PyMuPDF")
+def test_extract_page_image(tmp_path):
+    """A page that is just one upright scan yields the embedded image; composite pages are rendered."""
+    fitz = pdf_processor.fitz
+    scan = fitz.Pixmap(fitz.csGRAY, fitz.IRect(0, 0, 40, 60), False)
+    scan.clear_with(200)
+    png = scan.tobytes("png")
+    doc = fitz.open()
+    page = doc.new_page(width=200, height=300)
+    page.insert_image(page.rect, stream=png)
+    page = doc.new_page(width=200, height=300)  # Text over the scan
+    page.insert_image(page.rect, stream=png)
+    page.insert_text((20, 20), "Menu")
+    page = doc.new_page(width=200, height=300)  # Two images
+    page.insert_image(fitz.Rect(0, 0, 200, 150), stream=png)
+    page.insert_image(fitz.Rect(0, 150, 200, 300), stream=png)
+    page = doc.new_page(width=200, height=300)  # Rotated page
+    page.insert_image(page.rect, stream=png)
+    page.set_rotation(90)
+    page = doc.new_page(width=200, height=300)  # Scan with a transparency mask
+    transparent = fitz.Pixmap(fitz.csGRAY, fitz.IRect(0, 0, 40, 60), True)
+    transparent.clear_with(200)
+    page.insert_image(page.rect, stream=transparent.tobytes("png"))
+
+    image_path = pdf_processor.extract_page_image(doc, doc[0], str(tmp_path))
+    assert image_path == str(tmp_path / "page-1.png")
+    assert fitz.Pixmap(image_path).irect == scan.irect  # Native resolution, not the page size
+    assert [pdf_processor.extract_page_image(doc, page, str(tmp_path)) for page in doc[1:]] == [None] * 4
+
+def test_parse_tsv():
+    """Word rows are parsed into columns; Tesseract 5's decimal confidences are kept."""
+    tsv = ("level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext\n"
+           "1\t1\t0\t0\t0\t0\t0\t0\t842\t1200\t-1\t\n"
+           "4\t1\t1\t1\t1\t0\t324\t60\t157\t24\t-1\t\n"
+           "5\t1\t1\t1\t1\t1\t324\t62\t94\t22\t92.052216\tOktober\n"
+           "5\t1\t2\t1\t3\t1\t426\t60\t55\t21\t96\t2023\n")
+    words = parse_tsv(tsv)
+    assert words.text == ["Oktober", "2023"]
+    assert list(words.block) == [1, 2] and list(words.line) == [1, 3]
+    assert abs(words.conf[0] - 92.05) < 0.01
+    assert parse_tsv_output(tsv)[1]['left'] == 426
+
+    words.scale(0.5)
+    assert list(words.left) == [162, 213]
+    assert words.sorted_by_position().text == ["2023", "Oktober"]
+
+def test_group_lines():
+    """Lines follow Tesseract's line ids on skewed scans, and vertical overlap without ids."""
+    skewed = WordTable()
+    for line, (top, step) in enumerate(((100, -4), (120, -4)), start=1):
+        for i, text in enumerate(("Borst", "en", "pootjes")):
+            skewed.append(100 + i * 80, top + i * step, 70, 20, text, block=1, par=1, line=line)
+    assert line_texts(skewed) == ["Borst en pootjes"] * 2
+
+    unlabeled = WordTable()
+    unlabeled.append(300, 52, 40, 20, "zout")
+    unlabeled.append(100, 50, 60, 20, "Peper,")
+    unlabeled.append(100, 80, 60, 20, "olijfolie")
+    assert line_texts(unlabeled) == ["Peper, zout", "olijfolie"]
+
+def test_detect_columns():
+    """Column count is inferred from the gutters; full-width text below the columns goes to the footer."""
+    words = WordTable()
+    words.append(300, 20, 200, 30, "Voorgerecht")
+    for row in range(8):
+        top = 200 + row * 25
+        for x, text in ((100, "kwartels"), (180, "10"), (400, "witlof"), (700, "azijn")):
+            words.append(x, top, 60, 20, text)
+    words.append(395, 250, 10, 20, "|")  # table rule in a gutter
+    for row in range(6):
+        words.append(100, 500 + row * 25, 700, 20, "werkwijze")
+    words.append(100, 1150, 300, 20, "kookstudio")
+
+    result = detect_columns(words)
+    assert [len(column) for column in result['columns']] == [16, 9, 8]
+    assert result['header'].text == ["Voorgerecht"]
+    assert result['footer'].text == ["werkwijze"] * 6 + ["kookstudio"]
+    assert len(detect_columns(words, num_columns=2)['columns']) == 2
+
+def test_column_gutters_zero_width():
+    """Zero-width words (rounded text layer or scaled boxes) at the right edge stay inside the profile."""
+    words = WordTable()
+    words.append(100, 100, 50, 20, "abc")
+    words.append(300, 100, 0, 20, "x")
+    assert pdf_processor.column_gutters(words, 10) == [(150, 300)]
+    column = WordTable()
+    for row in range(5):
+        column.append(100, 100 + row * 25, 0, 20, "i")
+    result = detect_columns(column)
+    assert len(result['header']) + sum(map(len, result['columns'])) + len(result['footer']) == 5
+
+def test_no_thin_columns():
+    """A stray word beside a gutter-like gap is merged into its neighbour, not given its own column."""
+    path = os.path.join(os.path.dirname(__file__), '..', 'psm_comparison', 'page-3-psm12.tsv')
+    with open(path, encoding='utf-8') as f:
+        words = parse_tsv(f.read())
+    columns = detect_columns(words)['columns']
+    assert len(columns) == 3
+    assert min(map(len, columns)) >= pdf_processor.COLUMN_MIN_WORDS
+
+def test_stage_histogram():
+    """Spans are exported as cumulative Prometheus histogram buckets."""
+    histogram = Histogram("test_seconds", "Test stage timings.", "stage", buckets=(0.1, 1.0))
+    histogram.observe("ocr", 0.05)
+    histogram.observe("ocr", 0.5)
+    histogram.observe("ocr", 5.0)
+    lines = histogram.render()
+    assert 'test_seconds_bucket{stage="ocr",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="ocr",le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{stage="ocr",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{stage="ocr"} 3' in lines
+
+    timings = {}
+    with span("layout", timings):
+        pass
+    assert timings["layout"] >= 0
+    assert 'pdfocr_stage_seconds_count{stage="layout"}' in render_metrics()
+
+def test_adaptive_scale():
+    """The x-height estimate follows the text size, and the render scale is clamped."""
+    def text_lines(x_height, zoom):
+        # Dense x-height rows with sparse ascender and descender rows around them
+        width, rows = 400, []
+        for _ in range(20):
+            rows += [b"\xff" * width] * (4 * zoom)
+            rows += [(b"\x00" + b"\xff" * 9) * (width // 10)] * (2 * zoom)
+            rows += [b"\x00\xff" * (width // 2)] * (x_height * zoom)
+            rows += [(b"\x00" + b"\xff" * 9) * (width // 10)] * (2 * zoom)
+        return pdf_processor.RawImage(b"".join(rows), width, len(rows), 1)
+
+    assert pdf_processor.estimate_x_height(text_lines(5, 1)) == 5
+    assert pdf_processor.estimate_x_height(text_lines(5, 2)) == 10
+    assert pdf_processor.estimate_x_height(pdf_processor.RawImage(b"\xff" * 400, 20, 20, 1)) is None
+    assert pdf_processor.adaptive_scale(10, probe_scale=800) == 800 * pdf_processor.ADAPTIVE_TARGET_X_HEIGHT // 10
+    assert pdf_processor.adaptive_scale(0.5) == pdf_processor.ADAPTIVE_MAX_SCALE
+
+def test_page_window(monkeypatch, tmp_path):
+    """Long documents are rendered only a bounded number of pages ahead of OCR."""
+    in_flight = []
+
+    def fake_pages(pdf_path, output_dir, page_count=None, options=None):
+        for page_num in range(1, page_count + 1):
+            in_flight.append(page_num)
+            assert len(in_flight) <= 2 * pdf_processor.PAGES_IN_FLIGHT_PER_WORKER
+            yield page_num, str(tmp_path / f"page-{page_num}.png")
+
+    def fake_ocr(image, page_num, *args):
+        in_flight.remove(page_num)
+        return f"# Page {page_num}"
+
+    monkeypatch.setattr(pdf_processor, "pdf_page_count", lambda pdf_path: 250)
+    monkeypatch.setattr(pdf_processor, "iter_pdf_pages", fake_pages)
+    monkeypatch.setattr(pdf_processor, "process_page", fake_ocr)
+    pages = dict(pdf_processor.iter_pdf_markdown("archive.pdf", max_workers=2))
+    assert sorted(pages) == list(range(1, 251))
+
+def test_spare_workers_per_page(monkeypatch, tmp_path):
+    """Short documents give their pages the spare workers; long ones one run per page.
+
+    OpenMP threads are limited to the document's share of the cores either way.
+    """
+    page_runs = {}
+
+    def fake_ocr(image, page_num, omp_thread_limit, options, tsv_cache, max_workers):
+        page_runs[page_num] = (max_workers, omp_thread_limit)
+        return f"# Page {page_num}"
+
+    # A document gets half of the 8 cores, as with two executor workers
+    monkeypatch.setattr(pdf_processor.os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(pdf_processor, "MAX_OCR_WORKERS", 8)
+    for page_count in (1, 2, 250):
+        monkeypatch.setattr(pdf_processor, "pdf_page_count", lambda pdf_path: page_count)
+        monkeypatch.setattr(pdf_processor, "iter_pdf_pages", lambda pdf_path, output_dir, page_count, options: (
+            (page_num, str(tmp_path / f"page-{page_num}.png")) for page_num in range(1, page_count + 1)))
+        monkeypatch.setattr(pdf_processor, "process_page", fake_ocr)
+        dict(pdf_processor.iter_pdf_markdown("menu.pdf", max_workers=4))
+        assert page_runs[1] == {1: (4, 4), 2: (2, 2), 250: (1, 1)}[page_count]
+
+def test_incomplete_documents_not_cached(monkeypatch, tmp_path):
+    """A document with a failed page is returned but not cached."""
+    pdf_path = tmp_path / "menu.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4")
+    results = {1: "# Page 1", 2: None}
+    monkeypatch.setattr(pdf_processor, "pdf_page_count", lambda pdf_path: 2)
+    monkeypatch.setattr(pdf_processor, "iter_pdf_markdown", lambda *args: iter(results.items()))
+    cache = ResultCache()
+    assert process_pdf_to_markdown(str(pdf_path), cache=cache) == "# Page 1"
+    assert cache.get(pdf_processor.result_cache_key(str(pdf_path), pdf_processor.OcrOptions())) is None
+
+    results[2] = "# Page 2"
+    process_pdf_to_markdown(str(pdf_path), cache=cache)
+    assert cache.get(pdf_processor.result_cache_key(str(pdf_path), pdf_processor.OcrOptions())) is not None
+
+def test_cached_pages_replayed(monkeypatch, tmp_path):
+    """A cached document reports its pages and progress like a fresh conversion."""
+    pdf_path = tmp_path / "menu.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4")
+    monkeypatch.setattr(pdf_processor, "pdf_page_count", lambda pdf_path: 2)
+    monkeypatch.setattr(pdf_processor, "iter_pdf_markdown",
+                        lambda *args: iter({2: "# Page 2", 1: "# Page 1"}.items()))
+    cache = ResultCache()
+    markdown = process_pdf_to_markdown(str(pdf_path), cache=cache)
+
+    events = []
+    monkeypatch.setattr(pdf_processor, "iter_pdf_markdown", None)
+    assert process_pdf_to_markdown(str(pdf_path), cache=cache, progress=lambda *args: events.append(args),
+                                   on_page=lambda *args: events.append(args)) == markdown
+    assert events == [(0, 2), (1, 2), (1, "# Page 1"), (2, 2), (2, "# Page 2")]
+
+def test_ensemble_budget(monkeypatch):
+    """Extra ensemble runs get what is left of the page's budget; the primary run always completes."""
+    timeouts, images = {}, {}
+    clock = [100.0]
+
+    def fake_tesseract(image, omp_thread_limit=None, psm=3, oem=1, lang="nld", cache=None, engine="cli",
+                       timeout=None, output_format="tsv"):
+        timeouts[psm], images[psm] = timeout, image
+        clock[0] += 2
+        return f"psm {psm}"
+
+    monkeypatch.setattr(pdf_processor, "run_tesseract", fake_tesseract)
+    monkeypatch.setattr(pdf_processor.time, "monotonic", lambda: clock[0])
+    image = RawImage(bytes(4), 2, 2, 1)
+    options = pdf_processor.OcrOptions(ensemble_psms=(6, 11))
+    outputs = pdf_processor.ocr_ensemble(image, options=options, max_workers=1, deadline=103.0)
+    assert outputs == ["psm 3", "psm 6", None]
+    assert timeouts == {3: None, 6: 1.0}
+    assert images[3] is image
+    with pytest.raises(ValueError):
+        pdf_processor.OcrOptions(region_ocr=True, ensemble_psms=(6,))
+
+def test_page_regions():
+    """Columns are one region each, long footers are cut between lines, and crops copy the right pixels."""
+    columns = [WordTable(), WordTable()]
+    columns[0].append(100, 100, 200, 20, "boter")
+    columns[1].append(500, 100, 200, 20, "zout")
+    footer = WordTable()
+    for line in range(4):
+        footer.append(100, 300 + line * 40, 300, 20, "stap")
+        footer.append(450, 300 + line * 40, 250, 20, "twee")
+    layout = {'header': WordTable(), 'columns': columns, 'footer': footer}
+
+    regions = page_regions(layout, max_words=4)
+    assert [(kind, i) for kind, i, _ in regions] == [("column", 0), ("column", 1), ("footer", 0), ("footer", 0)]
+    assert [box for _, _, box in regions[2:]] == [(100, 300, 700, 360), (100, 380, 700, 440)]
+    assert len(page_regions(layout, max_words=8)) == 3
+
+    image = RawImage(bytes(range(12)), 4, 3, 1)
+    assert crop_raster(image, (1, 1, 3, 3)) == RawImage(bytes([5, 6, 9, 10]), 2, 2, 1)
+
+def test_ocr_regions(monkeypatch):
+    """Region words are mapped back to the page and kept once where crops overlap; one region means whole-page OCR."""
+    # Two columns below a header, on a page rendered at twice options.scale
+    page_words = [(100, 400 + row * 50, f"l{row}") for row in range(8)]
+    page_words += [(600, 400 + row * 50, f"r{row}") for row in range(8)]
+    edge_word = (150, 478, "rand")  # Missed by the layout, in both the header and the column crop
+    layout_boxes = [(left, top, left + 300, top + 40) for left, top, _ in page_words]
+
+    def fake_tesseract(crop, omp_thread_limit=None, psm=3, oem=1, lang="nld", cache=None, engine="cli",
+                       timeout=None, output_format="tsv"):
+        x0, y0, x1, y1 = crop
+        rows = ["level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext"]
+        for left, top, text in page_words + [edge_word]:
+            width, height = (100, 24) if text == "rand" else (300, 40)
+            if x0 <= left + width / 2 <= x1 and y0 <= top + height / 2 <= y1:
+                rows.append(f"5\t1\t1\t1\t1\t1\t{left - x0}\t{top - y0}\t{width}\t{height}\t90\t{text}")
+        return "\n".join(rows)
+
+    monkeypatch.setattr(pdf_processor.tesseract_api, "available", lambda: True)
+    monkeypatch.setattr(pdf_processor.tesseract_api, "layout_boxes", lambda image, psm, oem, lang: layout_boxes)
+    monkeypatch.setattr(pdf_processor, "crop_raster", lambda image, box: box)
+    monkeypatch.setattr(pdf_processor, "run_tesseract", fake_tesseract)
+    page = RawImage(bytes(1000 * 2400), 1000, 2400, 1)
+
+    result = pdf_processor.ocr_regions(page, max_workers=2)
+    assert [column.text for column in result['columns']] == [[f"l{row}" for row in range(2, 7)],
+                                                             [f"r{row}" for row in range(2, 7)]]
+    assert (result['columns'][1].left[0], result['columns'][1].top[0]) == (300, 250)
+    assert sorted(result['header'].text) == ["l0", "l1", "r0", "r1", "rand"]
+    assert sorted(result['footer'].text) == ["l7", "r7"]
+
+    layout_boxes = [layout_boxes[0], layout_boxes[8]]  # One line: a single header region
+    monkeypatch.setattr(pdf_processor, "run_tesseract", None)
+    assert pdf_processor.ocr_regions(page, max_workers=2) is None
+
+def test_word_table_extend():
+    """Appended words get block ids after the table's own, so their lines stay apart."""
+    merged = WordTable()
+    merged.append(0, 0, 10, 10, "a", block=1, line=1)
+    other = WordTable()
+    other.append(0, 0, 10, 10, "b", block=1, line=1)
+    merged.extend(other)
+    assert list(merged.block) == [1, 2]
+    assert merged.text == ["a", "b"]
+
+def test_merge_words():
+    """The most confident reading of a box wins; new words fill gaps, split duplicates don't."""
+    primary = WordTable()
+    primary.append(100, 100, 200, 20, "charnpignons", conf=40, block=1, par=1, line=1)
+    primary.append(400, 100, 100, 20, "boter", conf=95, block=1, par=1, line=1)
+    sparse = WordTable()
+    sparse.append(102, 101, 198, 20, "champignons", conf=90)
+    sparse.append(400, 100, 50, 20, "bo", conf=96)
+    sparse.append(600, 102, 80, 20, "zout", conf=92)
+
+    merged = merge_words(primary, [sparse])
+    assert merged.text == ["champignons", "boter", "zout"]
+    assert merged.line[2] == 1
+    assert line_texts(merged) == ["champignons boter zout"]
+
+def test_parse_hocr():
+    """Streamed hOCR gives the same words and lines as TSV, also when fed in chunks."""
+    hocr = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml"><body>
+ <div class='ocr_page' id='page_1' title='image "menu.png"; bbox 0 0 845 1200; ppageno 0'>
+  <div class='ocr_carea' id='block_1_1' title="bbox 36 92 580 120">
+   <p class='ocr_par' id='par_1_1' lang='nld' title="bbox 36 92 580 120">
+    <span class='ocr_line' id='line_1_1' title="bbox 36 92 580 120; baseline -0.019 -4; x_size 24">
+     <span class='ocrx_word' id='word_1_1' title='bbox 36 92 120 116; x_wconf 95'>Peper</span>
+     <span class='ocrx_word' id='word_1_2' title='bbox 130 92 200 120; x_wconf 87'><strong>&amp;</strong></span>
+     <span class='ocrx_word' id='word_1_3' title='bbox 210 92 580 118; x_wconf 91'>zout</span>
+    </span>
+   </p>
+  </div>
+ </div>
+</body></html>"""
+    words = parse_hocr(hocr[i:i + 100] for i in range(0, len(hocr), 100))
+    assert words.text == ["Peper", "&", "zout"]
+    assert (words.left[1], words.top[1], words.width[1], words.height[1], words.conf[1]) == (130, 92, 70, 28, 87)
+    assert line_texts(words) == ["Peper & zout"]
+    assert hocr_page_size(hocr) == (845, 1200)
+    line = next(record for record in iter_hocr(hocr) if record.kind == 'ocr_line')
+    assert (line.block, line.par, line.line, line.baseline) == (1, 1, 1, (-0.019, -4.0))
+    with pytest.raises(ValueError):
+        pdf_processor.OcrOptions(ocr_format="hocx")
+
+def test_scoring():
+    """Near-miss words and lines score as small errors instead of failures."""
+    assert edit_distance("champignons", "charnpignons") == 2
+    assert edit_distance("champignons", "soep", 2) == 3
+    assert substring_distance("zout", "peper & zoul", 2) == 1
+    scores = score_words(["champignons", "zout", "gr"], ["charnpignons", "zout", "gr."])
+    assert (scores['exact'], scores['fuzzy']) == (1, 2)
+    totals = align_lines(["Gebakken champignons 4,50", "Kabeljauw"], ["soep 3,00 gebakken charnpignons 4,50 bier"])
+    assert totals == {'ref_chars': 34, 'char_errors': 2 + 9, 'ref_words': 4, 'word_errors': 1 + 1}
+
 if __name__ == "__main__":
     test_pdf_processing()
-
@@ -0,0 +1,367 @@
+"""
+Columnar storage for OCR word boxes, and reconstruction of text lines.
+A page's words are kept as parallel array columns instead of one dict per
+word, which takes a fraction of the memory and lets layout passes scan a
+single column (e.g. all tops) without per-word key lookups.
+"""
+
+import sys
+import xml.etree.ElementTree as ET
+from array import array
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+class WordTable:
+    """Words of a page: parallel int columns, a float conf column and a text list.
+
+    Row i is one word: block[i], par[i], line[i] are Tesseract's layout ids
+    (0 when unknown), left/top/width/height its box in pixels, conf its
+    confidence (-1 when unknown) and text[i] its text. Texts are interned, so
+    repeated words ("gr", "dl", "peper") share one string.
+    """
+
+    INT_COLUMNS = ('block', 'par', 'line', 'left', 'top', 'width', 'height')
+
+    def __init__(self):
+        self.block = array('i')
+        self.par = array('i')
+        self.line = array('i')
+        self.left = array('i')
+        self.top = array('i')
+        self.width = array('i')
+        self.height = array('i')
+        self.conf = array('f')
+        self.text: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def append(self, left: int, top: int, width: int, height: int, text: str,
+               conf: float = -1.0, block: int = 0, par: int = 0, line: int = 0) -> None:
+        self.block.append(block)
+        self.par.append(par)
+        self.line.append(line)
+        self.left.append(left)
+        self.top.append(top)
+        self.width.append(width)
+        self.height.append(height)
+        self.conf.append(conf)
+        self.text.append(sys.intern(text))
+
+    def select(self, indices: Iterable[int]) -> "WordTable":
+        """Return a new table with the given rows, in the given order."""
+        indices = list(indices)
+        table = WordTable()
+        for name in self.INT_COLUMNS + ('conf',):
+            column = getattr(self, name)
+            setattr(table, name, array(column.typecode, [column[i] for i in indices]))
+        table.text = [self.text[i] for i in indices]
+        return table
+
+    def sorted_by_position(self) -> "WordTable":
+        """Return the rows in reading order: by top, then left."""
+        top, left = self.top, self.left
+        return self.select(sorted(range(len(self)), key=lambda i: (top[i], left[i])))
+
+    def scale(self, factor: float) -> None:
+        """Scale the word boxes in place."""
+        for name in ('left', 'top', 'width', 'height'):
+            column = getattr(self, name)
+            setattr(self, name, array('i', [round(value * factor) for value in column]))
+
+    def offset(self, dx: int, dy: int) -> None:
+        """Move the word boxes in place, e.g. from a crop's pixels to the page's."""
+        self.left = array('i', [left + dx for left in self.left])
+        self.top = array('i', [top + dy for top in self.top])
+
+    def extend(self, other: "WordTable") -> None:
+        """Append another table's rows, renumbering its blocks after this table's so lines stay apart."""
+        block_offset = max(self.block, default=0)
+        self.block.extend(block + block_offset if block else 0 for block in other.block)
+        for name in self.INT_COLUMNS[1:] + ('conf',):
+            getattr(self, name).extend(getattr(other, name))
+        self.text.extend(other.text)
+
+    def to_dicts(self) -> List[Dict]:
+        """Return one dict per word, with the keys of Tesseract's TSV columns (word_num is not kept)."""
+        return [
+            {
+                'level': 5,
+                'page_num': 1,
+                'block_num': self.block[i],
+                'par_num': self.par[i],
+                'line_num': self.line[i],
+                'word_num': 0,
+                'left': self.left[i],
+                'top': self.top[i],
+                'width': self.width[i],
+                'height': self.height[i],
+                'conf': self.conf[i],
+                'text': self.text[i]
+            }
+            for i in range(len(self))
+        ]
+
+def parse_tsv(tsv_data: str) -> WordTable:
+    """Parse the word rows (level 5) of Tesseract TSV output into a WordTable.
+
+    The header line and block/paragraph/line rows are skipped. Confidences
+    may be integers (Tesseract 4) or decimals (Tesseract 5).
+    """
+    table = WordTable()
+    block, par, line = table.block.append, table.par.append, table.line.append
+    left, top, width, height = table.left.append, table.top.append, table.width.append, table.height.append
+    conf, text = table.conf.append, table.text.append
+    intern = sys.intern
+
+    for row in tsv_data.split('\n'):
+        if not row.startswith('5\t'):
+            continue
+        parts = row.split('\t', 11)
+        if len(parts) < 11:
+            continue
+        try:
+            values = [int(part) for part in parts[2:10]]
+            word_conf = float(parts[10])
+        except ValueError:
+            continue
+        block(values[0])
+        par(values[1])
+        line(values[2])
+        left(values[4])
+        top(values[5])
+        width(values[6])
+        height(values[7])
+        conf(word_conf)
+        text(intern(parts[11].rstrip('\r') if len(parts) > 11 else ''))
+    return table
+
+# hOCR classes of text lines; Tesseract marks headings and captions with
+# their own classes
+HOCR_LINE_CLASSES = {'ocr_line', 'ocr_header', 'ocr_caption', 'ocr_textfloat'}
+HOCR_CLASSES = {'ocr_page', 'ocr_carea', 'ocr_par', 'ocrx_word'} | HOCR_LINE_CLASSES
+
+class HocrRecord(NamedTuple):
+    """One element of Tesseract hOCR output, as streamed by iter_hocr."""
+    kind: str                                  # hOCR class: ocr_page, ocr_carea, ocr_par, ocr_line, ocrx_word, ...
+    block: int                                 # ordinal of the enclosing ocr_carea (1-based, 0 before the first)
+    par: int                                   # ordinal of the enclosing ocr_par within the page
+    line: int                                  # ordinal of the enclosing line within the page
+    bbox: Tuple[int, int, int, int]            # x0, y0, x1, y1
+    conf: float                                # x_wconf of words, -1 for other elements
+    baseline: Optional[Tuple[float, float]]    # slope and offset of lines, None for other elements
+    text: str                                  # text of words, '' for other elements
+
+def hocr_title(title: str) -> Dict[str, str]:
+    """Split an hOCR title attribute ("bbox 1 2 3 4; x_wconf 96") into its properties."""
+    properties = {}
+    for part in title.split(';'):
+        name, _, value = part.strip().partition(' ')
+        if name:
+            properties[name] = value
+    return properties
+
+def iter_hocr(source: Union[str, Iterable[str]]) -> Iterator[HocrRecord]:
+    """Stream the page, block, paragraph, line and word elements of hOCR output.
+
+    source is the whole document or an iterable of chunks of it (e.g. a
+    file read block by block), fed to an incremental XML parser. Container
+    records are yielded when their element opens, word records when it
+    closes, and parsed elements are cleared as soon as they have been
+    handled, so memory stays flat on large pages and no DOM is built.
+    Accepts the full XHTML document of the tesseract CLI as well as the
+    bare ocr_page fragment of libtesseract.
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    block = par = line = 0
+    for chunk in ([source] if isinstance(source, str) else source):
+        parser.feed(chunk)
+        for event, element in parser.read_events():
+            kind = element.get('class')
+            if kind not in HOCR_CLASSES:
+                continue
+            if kind == 'ocrx_word':
+                if event == 'start':
+                    continue  # Its text is complete when it closes
+            elif event == 'end':
+                element.clear()
+                continue
+
+            if kind == 'ocr_carea':
+                block += 1
+            elif kind == 'ocr_par':
+                par += 1
+            elif kind in HOCR_LINE_CLASSES:
+                line += 1
+            properties = hocr_title(element.get('title', ''))
+            try:
+                x0, y0, x1, y1 = (int(value) for value in properties.get('bbox', '').split())
+            except ValueError:
+                continue
+            baseline = None
+            if 'baseline' in properties:
+                slope, offset = properties['baseline'].split()
+                baseline = (float(slope), float(offset))
+            text = ''
+            conf = -1.0
+            if kind == 'ocrx_word':
+                text = ''.join(element.itertext()).strip()
+                conf = float(properties.get('x_wconf', -1))
+                element.clear()
+            yield HocrRecord(kind, block, par, line, (x0, y0, x1, y1), conf, baseline, text)
+    parser.close()
+
+def parse_hocr(source: Union[str, Iterable[str]]) -> WordTable:
+    """Parse the words of Tesseract hOCR output into a WordTable, like parse_tsv does for TSV.
+
+    Blocks, paragraphs and lines are numbered in document order, so
+    group_lines keeps hOCR lines together.
+    """
+    table = WordTable()
+    for record in iter_hocr(source):
+        if record.kind == 'ocrx_word' and record.text:
+            x0, y0, x1, y1 = record.bbox
+            table.append(x0, y0, x1 - x0, y1 - y0, record.text, conf=record.conf,
+                         block=record.block, par=record.par, line=record.line)
+    return table
+
+def hocr_page_size(source: Union[str, Iterable[str]]) -> Optional[Tuple[int, int]]:
+    """Return the (width, height) of the OCR'd image from the ocr_page element of hOCR output."""
+    # ocr_page is the first element, so only the start of the document is parsed
+    record = next(iter_hocr(source), None)
+    if record is None or record.kind != 'ocr_page':
+        return None
+    x0, y0, x1, y1 = record.bbox
+    return x1 - x0, y1 - y0
+
+# Without layout ids, a word joins a line when at least this fraction of its
+# height overlaps the line's vertical extent
+LINE_MIN_OVERLAP = 0.5
+
+def group_lines(words: WordTable) -> List[List[int]]:
+    """Group words into text lines; return each line's rows left to right, lines top to bottom.
+
+    Words with Tesseract's (block, par, line) ids are grouped by those ids,
+    which follow the recognizer's own line finding and survive skewed
+    scans. Words without ids (line 0) are clustered by vertical overlap
+    instead. All rows are then distributed to their lines in a single pass
+    over one left-to-right sort, so words come out in reading order without
+    sorting each line.
+    """
+    top, height = words.top, words.height
+
+    # Interval-overlap clustering for unlabeled words: visit them by top and
+    # add each to the first open line it overlaps enough, or open a new one.
+    # Lines that end above the current word can't take any later word.
+    cluster_of = {}
+    open_lines: List[List[int]] = []  # [line_top, line_bottom, cluster]
+    clusters = 0
+    for row in sorted((row for row in range(len(words)) if not words.line[row]), key=top.__getitem__):
+        word_top, word_bottom = top[row], top[row] + height[row]
+        min_overlap = max(1, height[row] * LINE_MIN_OVERLAP)
+        open_lines = [line for line in open_lines if line[1] > word_top]
+        for line in open_lines:
+            if min(word_bottom, line[1]) - max(word_top, line[0]) >= min_overlap:
+                line[0] = min(line[0], word_top)
+                line[1] = max(line[1], word_bottom)
+                cluster_of[row] = line[2]
+                break
+        else:
+            cluster_of[row] = clusters
+            open_lines.append([word_top, word_bottom, clusters])
+            clusters += 1
+
+    lines: Dict[object, List[int]] = {}
+    for row in sorted(range(len(words)), key=words.left.__getitem__):
+        key = (words.block[row], words.par[row], words.line[row]) if words.line[row] else cluster_of[row]
+        lines.setdefault(key, []).append(row)
+    return sorted(lines.values(), key=lambda rows: min(top[row] for row in rows))
+
+def line_texts(words: WordTable) -> List[str]:
+    """Return the text of each line found by group_lines."""
+    return [' '.join(words.text[row] for row in rows) for rows in group_lines(words)]
+
+def box_intersection(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> int:
+    """Area shared by two (left, top, width, height) boxes."""
+    overlap_x = min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0])
+    overlap_y = min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1])
+    return overlap_x * overlap_y if overlap_x > 0 and overlap_y > 0 else 0
+
+def box_iou(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> float:
+    """Intersection over union of two (left, top, width, height) boxes."""
+    intersection = box_intersection(a, b)
+    return intersection / (a[2] * a[3] + b[2] * b[3] - intersection) if intersection else 0.0
+
+# Hypotheses of different OCR runs are the same word when their boxes
+# overlap by at least MERGE_MIN_IOU. A word only a secondary run found is
+# added when its confidence is at least MERGE_MIN_NEW_CONF and at most
+# MERGE_MAX_NEW_COVERED of its box overlaps known words: other modes split
+# and join words differently ("Kabel" + "jauw"), and those pieces must not
+# be added next to the whole word.
+MERGE_MIN_IOU = 0.7
+MERGE_MIN_NEW_CONF = 80.0
+MERGE_MAX_NEW_COVERED = 0.2
+
+def merge_words(primary: WordTable, others: List[WordTable]) -> WordTable:
+    """Merge the words of several OCR runs of one image, keeping the most confident reading of each box.
+
+    The primary run's boxes and layout ids are kept, so its lines hold
+    together. A word from another run that overlaps a primary word by
+    MERGE_MIN_IOU replaces that word's text and confidence if it is more
+    confident. Words no earlier run found are added if they are confident
+    enough; they join the line of the primary word they overlap most
+    vertically, or stay unlabeled for group_lines to cluster.
+    """
+    merged = primary.select(range(len(primary)))
+    heights = sorted(primary.height) or [1]
+    # Index the merged words by rows of text height, so each lookup only
+    # compares boxes on nearby rows
+    row_height = max(1, heights[len(heights) // 2])
+    rows: Dict[int, List[int]] = {}
+
+    def index(i: int) -> None:
+        for row in range(merged.top[i] // row_height, (merged.top[i] + merged.height[i]) // row_height + 1):
+            rows.setdefault(row, []).append(i)
+
+    def nearby(top: int, height: int) -> Iterable[int]:
+        seen = set()
+        for row in range(top // row_height, (top + height) // row_height + 1):
+            for i in rows.get(row, ()):
+                if i not in seen:
+                    seen.add(i)
+                    yield i
+
+    for i in range(len(merged)):
+        index(i)
+    primary_count = len(merged)
+    for words in others:
+        for j in range(len(words)):
+            box = (words.left[j], words.top[j], words.width[j], words.height[j])
+            best, best_iou = None, MERGE_MIN_IOU
+            covered = 0
+            for i in nearby(box[1], box[3]):
+                iou = box_iou(box, (merged.left[i], merged.top[i], merged.width[i], merged.height[i]))
+                if iou >= best_iou:
+                    best, best_iou = i, iou
+                covered += box_intersection(box, (merged.left[i], merged.top[i], merged.width[i], merged.height[i]))
+            if best is not None:
+                if words.conf[j] > merged.conf[best]:
+                    merged.text[best] = words.text[j]
+                    merged.conf[best] = words.conf[j]
+                continue
+            if (words.conf[j] < MERGE_MIN_NEW_CONF or not words.text[j].strip()
+                    or covered > box[2] * box[3] * MERGE_MAX_NEW_COVERED):
+                continue
+
+            # A new word: put it on the primary line it overlaps most
+            line_of, best_overlap = None, box[3] * LINE_MIN_OVERLAP
+            for i in nearby(box[1], box[3]):
+                overlap = min(box[1] + box[3], merged.top[i] + merged.height[i]) - max(box[1], merged.top[i])
+                if i < primary_count and merged.line[i] and overlap >= best_overlap:
+                    line_of, best_overlap = i, overlap
+            if line_of is None:
+                merged.append(*box, words.text[j], conf=words.conf[j])
+            else:
+                merged.append(*box, words.text[j], conf=words.conf[j], block=merged.block[line_of],
+                              par=merged.par[line_of], line=merged.line[line_of])
+            index(len(merged) - 1)
+    return merged
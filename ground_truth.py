@@ -0,0 +1,99 @@
+"""
+Ground truth for the sample menu pages in docs/: the ingredient columns of
+each recipe page, transcribed from the conversion plan. Used by sweep.py
+and backend/benchmark.py to score OCR output.
+"""
+
+from typing import Iterable, Set
+
+EXPECTED_CONTENT = {
+    'page-2': {
+        'column_1': [
+            "Hazenrug filet;",
+            "4 hazenrug filet",
+            "Peper zout olijfolie",
+            "6 grote champignons 2 sjalot. 1/4",
+            "bieslook"
+        ],
+        'column_2': [
+            "Garnituur:",
+            "1/2 spitskool",
+            "1/4 rode kool",
+            "Tijm peper zout, azijn",
+            "suiker",
+            "Bieten peper zout olijfolie"
+        ],
+        'column_3': [
+            "Dressing:",
+            "50 gr rode wijn azijn,",
+            "2 sjalotjes, 100 gr",
+            "zonnebloem olie, peper, zout"
+        ]
+    },
+    'page-3': {
+        'column_1': [
+            "Patrijs met rode pootjes:",
+            "5 x patrijs",
+            "Peper, zout",
+            "Fond 2 bakjes, 1 bakje water"
+        ],
+        'column_2': [
+            "Garnituur:",
+            "Witlof 8/10 stronkjes",
+            "Peper, zout, honing",
+            "4 aardappels",
+            "3 witte uien, 2 dl rode wijn",
+            "azijn, 2/4 lepels suiker"
+        ],
+        'column_3': [
+            "Ananas saus:",
+            "2 bakjes fond 1/4 ananas",
+            "Peper, zout"
+        ]
+    },
+    'page-4': {
+        'column_1': [
+            "Hertenhaas filet:",
+            "2 filets",
+            "peper, zout, olijfolie"
+        ],
+        'column_2': [
+            "Groenten:",
+            "3 peren/ amandel schaafsel",
+            "250 gr paddenstoelen/3 sjalot",
+            "5 pp gr spruiten/ spekje",
+            "250 gr orzo 1/4 bieslook"
+        ],
+        'column_3': [
+            "Saus :",
+            "6 dl fond 2 dl rode wijn",
+            "2 sjalotjes 100 gr boter",
+            "Wild kruid"
+        ]
+    },
+    'page-5': {
+        'column_1': [
+            "Appeltje:",
+            "10 appeltjes frangipane/of spijs",
+            "Suiker",
+            "Poedersuiker",
+            "Bladerdeeg 3 plakjes"
+        ],
+        'column_2': [
+            "Parfait:",
+            "5 eidooiers en 2 eieren",
+            "100 gr suiker",
+            "400 gr room",
+            "6 speculaas"
+        ],
+        'column_3': [
+            "koekje:",
+            "3 plakje bladerdeeg",
+            "Suiker kaneel, water"
+        ]
+    }
+}
+
+def expected_words(lines: Iterable[str]) -> Set[str]:
+    """The set of lowercased words in some expected lines, as hit rates count them."""
+    return set(' '.join(lines).lower().split())
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Parameter sweep of Tesseract settings over the sample menu pages.
+
+Every cell of a psm x oem x lang x output format x render scale grid is run
+over a page corpus on a process pool. The raw OCR output and its run time
+are cached per page image and settings in .ocr_cache/sweep, so re-running a
+sweep after changing the layout or scoring code doesn't re-run Tesseract.
+The result is one table with the word count, ground-truth scores (see
+ground_truth.py and backend/scoring.py) and OCR time of each grid cell:
+exact and fuzzy word hit rates, the column hit rate, and the character and
+word error rates (CER, WER) of the expected lines. It is written to
+sweep_results/sweep.md and, per page, sweep_results/sweep.json.
+
+Usage:
+    python sweep.py                                   # psm 6 11 12, nld, tsv, native size
+    python sweep.py --psm 3 6 --format tsv hocr --scale native 1200 2400
+    python sweep.py --corpus docs/page-2.png --workers 1 --no-cache
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from itertools import product
+from typing import Dict, List, Optional
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(REPO_DIR, 'backend'))
+from cache import ResultCache, make_key
+from ground_truth import EXPECTED_CONTENT, expected_words
+from pdf_processor import (PageImage, detect_columns, image_sha256, load_raster, parse_ocr_output, resize_raster,
+                           run_tesseract)
+from scoring import align_lines, error_rate, score_words
+from words import WordTable, line_texts
+
+DEFAULT_CORPUS = os.path.join(REPO_DIR, 'docs', 'page-*.png')
+CACHE_DIR = os.path.join('.ocr_cache', 'sweep')
+FORMAT_SUFFIXES = {'tsv': '.tsv', 'hocr': '.hocr'}
+
+@dataclass(frozen=True)
+class Cell:
+    """One OCR run of the sweep: a page image and the settings to run it with."""
+    page: str
+    psm: int
+    oem: int
+    lang: str
+    output_format: str
+    scale: str  # "native", or the longer side in pixels to resample the page to
+
+def load_page(path: str, scale: str) -> PageImage:
+    """The page image to OCR: the file itself at native size, else a raster resampled to scale pixels."""
+    if scale == 'native':
+        return path
+    raster = load_raster(path)
+    if raster is None:
+        raise RuntimeError("Render scales other than 'native' need PyMuPDF")
+    return resize_raster(raster, int(scale))
+
+_cache: Optional[ResultCache] = None
+
+def init_worker(cache_dir: Optional[str]) -> None:
+    """Process pool initializer: open the OCR output cache once per worker."""
+    global _cache
+    _cache = ResultCache(cache_dir, suffix='.json') if cache_dir else None
+
+def run_cell(cell: Cell, engine: str, omp_thread_limit: Optional[int]) -> Dict:
+    """OCR one cell (or fetch it from the cache) and score the words it found."""
+    image = load_page(cell.page, cell.scale)
+    cache_key = make_key(image_sha256(image), {'psm': cell.psm, 'oem': cell.oem, 'lang': cell.lang,
+                                               'format': cell.output_format, 'engine': engine})
+    cached = _cache.get(cache_key) if _cache is not None else None
+    if cached is not None:
+        record = json.loads(cached)
+    else:
+        start = time.perf_counter()
+        output = run_tesseract(image, omp_thread_limit, cell.psm, cell.oem, cell.lang, engine=engine,
+                               output_format=cell.output_format)
+        record = {'output': output, 'seconds': time.perf_counter() - start}
+        if _cache is not None and output is not None:
+            _cache.put(cache_key, json.dumps(record))
+
+    result = {**asdict(cell), 'cached': cached is not None, 'seconds': record['seconds'],
+              'output': record['output'], 'words': 0, 'failed': record['output'] is None}
+    if record['output'] is None:
+        return result
+    words = parse_ocr_output(record['output'], cell.output_format)
+    result['words'] = len(words)
+    result.update(score_page(words, EXPECTED_CONTENT.get(page_name(cell.page))))
+    return result
+
+def page_name(path: str) -> str:
+    """Ground-truth key of a page image: its file name without extension (page-2)."""
+    return os.path.splitext(os.path.basename(path))[0]
+
+def score_page(words: WordTable, columns: Optional[Dict[str, List[str]]]) -> Dict:
+    """Score the page against its ground-truth columns.
+
+    Counts the expected words found exactly, found within a few edits, and
+    found in the column detect_columns puts them in, plus the character and
+    word errors of the expected lines in the OCR lines. Pages without ground
+    truth get no scores.
+    """
+    if not columns:
+        return {}
+    found = expected_words(words.text)
+    layout = detect_columns(words, num_columns=len(columns))
+    column_hits = 0
+    for expected_lines, column in zip(columns.values(), layout['columns']):
+        column_hits += len(expected_words(expected_lines) & expected_words(column.text))
+    page_lines = [line for lines in columns.values() for line in lines]
+    page_words = expected_words(page_lines)
+    return {
+        'expected': len(page_words),
+        'hits': len(page_words & found),
+        'fuzzy_hits': score_words(page_words, found)['fuzzy'],
+        'column_expected': sum(len(expected_words(lines)) for lines in columns.values()),
+        'column_hits': column_hits,
+        **align_lines(page_lines, line_texts(words)),
+    }
+
+def summarize(results: List[Dict]) -> List[Dict]:
+    """Add up the page results of each grid point, in grid order."""
+    rows: Dict[tuple, Dict] = {}
+    for result in results:
+        key = (result['psm'], result['oem'], result['lang'], result['output_format'], result['scale'])
+        row = rows.setdefault(key, dict(zip(('psm', 'oem', 'lang', 'format', 'scale'), key),
+                                        pages=0, failed=0, cached=0, words=0, expected=0, hits=0, fuzzy_hits=0,
+                                        column_expected=0, column_hits=0, ref_chars=0, char_errors=0,
+                                        ref_words=0, word_errors=0, seconds=0.0))
+        row['pages'] += 1
+        row['failed'] += result['failed']
+        row['cached'] += result['cached']
+        for field in ('words', 'expected', 'hits', 'fuzzy_hits', 'column_expected', 'column_hits', 'ref_chars',
+                      'char_errors', 'ref_words', 'word_errors', 'seconds'):
+            row[field] += result.get(field, 0)
+    return list(rows.values())
+
+def format_table(rows: List[Dict]) -> str:
+    """Markdown table of the summary rows."""
+    def rate(hits: int, total: int) -> str:
+        return f"{hits}/{total} ({hits / total:.1%})" if total else "-"
+
+    def percent(errors: int, total: int) -> str:
+        value = error_rate(errors, total)
+        return "-" if value is None else f"{value:.1%}"
+
+    lines = [
+        "| psm | oem | lang | format | scale | pages | words | hit rate | fuzzy hit rate | column hit rate "
+        "| CER | WER | OCR s | cached |",
+        "|---|---|---|---|---|---|---|---|---|---|---|---|---|---|",
+    ]
+    for row in rows:
+        pages = f"{row['pages']}" + (f" ({row['failed']} failed)" if row['failed'] else "")
+        lines.append(f"| {row['psm']} | {row['oem']} | {row['lang']} | {row['format']} | {row['scale']} "
+                     f"| {pages} | {row['words']} | {rate(row['hits'], row['expected'])} "
+                     f"| {rate(row['fuzzy_hits'], row['expected'])} "
+                     f"| {rate(row['column_hits'], row['column_expected'])} "
+                     f"| {percent(row['char_errors'], row['ref_chars'])} "
+                     f"| {percent(row['word_errors'], row['ref_words'])} | {row['seconds']:.1f} "
+                     f"| {row['cached']}/{row['pages']} |")
+    return '\n'.join(lines)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--corpus', nargs='+', default=[DEFAULT_CORPUS],
+                        help="page images or glob patterns (default: docs/page-*.png)")
+    parser.add_argument('--psm', nargs='+', type=int, default=[6, 11, 12])
+    parser.add_argument('--oem', nargs='+', type=int, default=[1])
+    parser.add_argument('--lang', nargs='+', default=['nld'])
+    parser.add_argument('--format', nargs='+', default=['tsv'], choices=list(FORMAT_SUFFIXES), dest='formats')
+    parser.add_argument('--scale', nargs='+', default=['native'],
+                        help="'native' or the longer page side in pixels (needs PyMuPDF)")
+    parser.add_argument('--engine', default='cli', choices=['cli', 'tesserocr'])
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--no-cache', action='store_true', help="always run Tesseract (for timings)")
+    parser.add_argument('--output-dir', default='sweep_results')
+    parser.add_argument('--save-output', action='store_true', help="also write each cell's raw OCR output")
+    args = parser.parse_args(argv)
+
+    pages = sorted({path for pattern in args.corpus for path in glob.glob(pattern)})
+    if not pages:
+        print(f"No page images found for {' '.join(args.corpus)}")
+        return
+    cells = [Cell(page, psm, oem, lang, output_format, scale)
+             for psm, oem, lang, output_format, scale, page
+             in product(args.psm, args.oem, args.lang, args.formats, args.scale, pages)]
+    print(f"Running {len(cells)} cells ({len(cells) // len(pages)} settings x {len(pages)} pages) "
+          f"on {args.workers} workers")
+
+    # Several Tesseract runs at a time share the cores instead of each
+    # starting one OpenMP thread per core
+    omp_thread_limit = 1 if args.workers > 1 else None
+    results: List[Dict] = [{}] * len(cells)
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                             initargs=(None if args.no_cache else CACHE_DIR,)) as executor:
+        futures = {executor.submit(run_cell, cell, args.engine, omp_thread_limit): i for i, cell in enumerate(cells)}
+        for done, future in enumerate(as_completed(futures), 1):
+            result = results[futures[future]] = future.result()
+            print(f"  [{done}/{len(cells)}] {page_name(result['page'])} psm {result['psm']} oem {result['oem']} "
+                  f"{result['lang']} {result['output_format']} {result['scale']}: "
+                  f"{'failed' if result['failed'] else str(result['words']) + ' words'}"
+                  f"{' (cached)' if result['cached'] else ''}")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    if args.save_output:
+        for result in results:
+            if result['output'] is not None:
+                name = (f"{page_name(result['page'])}-psm{result['psm']}-oem{result['oem']}-{result['lang']}"
+                        f"-{result['scale']}{FORMAT_SUFFIXES[result['output_format']]}")
+                with open(os.path.join(args.output_dir, name), 'w') as f:
+                    f.write(result['output'])
+    for result in results:
+        del result['output']
+
+    table = format_table(summarize(results))
+    with open(os.path.join(args.output_dir, 'sweep.md'), 'w') as f:
+        f.write(f"# OCR parameter sweep\n\nCorpus: {', '.join(page_name(page) for page in pages)}\n\n{table}\n")
+    with open(os.path.join(args.output_dir, 'sweep.json'), 'w') as f:
+        json.dump(results, f, indent=2)
+    print()
+    print(table)
+    print(f"\nResults saved in {args.output_dir}/ (sweep.md, sweep.json)")
+
+if __name__ == '__main__':
+    main()